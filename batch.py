@@ -0,0 +1,85 @@
+import argparse
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import pandas as pd
+
+from conseils_pdf import generate_hygiene_pdf
+from sorties import nom_fichier
+
+# Génération en lot des conseils d'hygiène à partir d'une liste de patients (CSV ou JSONL).
+# Les colonnes portent les mêmes noms que les clés de prepare_data() ("Nom et Prénom", "IHO Technique de brossage", ...).
+#
+#   python batch.py rappels_du_jour.csv -o conseils.zip
+#   python batch.py rappels_du_jour.jsonl -o conseils.pdf --workers 4
+
+
+# Fonction pour charger les patients : une liste de dictionnaires au format prepare_data(), valeurs vides retirées
+def charger_patients(chemin):
+    if chemin.endswith((".jsonl", ".json")):
+        df = pd.read_json(chemin, lines=chemin.endswith(".jsonl"), dtype=False)
+    else:
+        df = pd.read_csv(chemin, dtype=str, keep_default_na=False, sep=None, engine="python")
+    records = []
+    for record in df.to_dict(orient="records"):
+        records.append({
+            cle: valeur for cle, valeur in record.items()
+            if valeur is not None and valeur == valeur and valeur != ""  # valeur != valeur : NaN
+        })
+    return records
+
+
+# Fonction pour rendre tous les conseils en parallèle ; renvoie les PDF dans l'ordre des patients
+def generer_lot(records, workers=None):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(records) < 2:
+        return [generate_hygiene_pdf(record) for record in records]
+    chunksize = max(1, len(records) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(generate_hygiene_pdf, records, chunksize=chunksize))
+
+
+# Fonction pour regrouper les PDF dans une archive ZIP (un fichier par patient)
+def ecrire_zip(records, pdfs, sortie):
+    with zipfile.ZipFile(sortie, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for i, (record, pdf) in enumerate(zip(records, pdfs), start=1):
+            archive.writestr(f"{i:04d}_{nom_fichier('Conseils_Hygiene', record.get('Nom et Prénom'), 'pdf')}", pdf)
+
+
+# Fonction pour fusionner les PDF en un seul document à imprimer
+def ecrire_pdf_fusionne(pdfs, sortie):
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for pdf in pdfs:
+        writer.append(BytesIO(pdf))
+    writer.write(sortie)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère les conseils d'hygiène pour une liste de patients.")
+    parser.add_argument("patients", help="Fichier CSV ou JSONL des patients (colonnes = clés de prepare_data)")
+    parser.add_argument("-o", "--sortie", default="conseils_hygiene.zip", help="Fichier .zip ou .pdf (fusionné)")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut : nombre de cœurs)")
+    args = parser.parse_args(argv)
+
+    debut = time.perf_counter()
+    records = charger_patients(args.patients)
+    pdfs = generer_lot(records, workers=args.workers)
+    if args.sortie.endswith(".pdf"):
+        ecrire_pdf_fusionne(pdfs, args.sortie)
+    else:
+        ecrire_zip(records, pdfs, args.sortie)
+    duree = time.perf_counter() - debut
+
+    debit = len(records) / duree if duree else 0
+    print(f"{len(records)} documents générés dans {args.sortie} en {duree:.2f} s ({debit:.1f} documents/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Temps d'import des modules de l'app au démarrage (python -X importtime), Streamlit déjà chargé.
+# Échoue si une dépendance lourde (réservée aux PDF, exports, historique ou CBIP) est importée au démarrage,
+# ou si le budget est dépassé.
+#
+#   python bench/importtime.py --budget-ms 150 --json importtime.json
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(RACINE, "streamlit_app.py")
+LOURDS = ["pandas", "numpy", "pyarrow", "reportlab", "requests", "pypdf"]
+
+
+# Modules locaux importés en tête de streamlit_app.py
+def modules_app():
+    with open(APP, encoding="utf-8") as f:
+        arbre = ast.parse(f.read())
+    modules = []
+    for noeud in arbre.body:
+        if isinstance(noeud, ast.Import):
+            noms = [alias.name for alias in noeud.names]
+        elif isinstance(noeud, ast.ImportFrom) and noeud.module:
+            noms = [noeud.module]
+        else:
+            continue
+        modules.extend(nom for nom in noms if os.path.exists(os.path.join(RACINE, f"{nom}.py")))
+    return modules
+
+
+# Un démarrage à froid : lignes d'importtime après le chargement de Streamlit (self µs, cumulé µs, module)
+def mesurer_une_fois(modules):
+    code = "import streamlit\n" + "".join(f"import {module}\n" for module in modules)
+    sortie = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=RACINE, capture_output=True, text=True, check=True
+    ).stderr
+    lignes, apres_streamlit = [], False
+    for ligne in sortie.splitlines():
+        if not ligne.startswith("import time:") or "self [us]" in ligne:
+            continue
+        self_us, cumule_us, nom = ligne[len("import time:"):].split("|")
+        nom = nom[1:].rstrip()  # l'indentation restante indique un import imbriqué
+        if apres_streamlit:
+            lignes.append((int(self_us), int(cumule_us), nom))
+        elif nom == "streamlit":
+            apres_streamlit = True
+    return lignes
+
+
+def mesurer(repetitions=5):
+    modules = modules_app()
+    totaux, par_module, importes = [], {module: [] for module in modules}, set()
+    for _ in range(repetitions):
+        lignes = mesurer_une_fois(modules)
+        totaux.append(sum(self_us for self_us, _, _ in lignes) / 1000)
+        for _, cumule_us, nom in lignes:
+            importes.add(nom.strip().split(".")[0])
+            if nom in par_module:
+                par_module[nom].append(cumule_us / 1000)
+    return {
+        "python": sys.version.split()[0],
+        "repetitions": repetitions,
+        "imports_app_ms": round(statistics.median(totaux), 2),
+        "par_module_ms": {module: round(statistics.median(temps), 2) if temps else 0.0 for module, temps in par_module.items()},
+        "dependances_lourdes": sorted(importes & set(LOURDS)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure le temps d'import des modules de l'app au démarrage.")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None, help="Échec si les imports de l'app dépassent ce temps")
+    parser.add_argument("--json", help="Fichier où écrire les résultats")
+    args = parser.parse_args(argv)
+
+    resultats = mesurer(args.repetitions)
+    print(json.dumps(resultats, indent=2, ensure_ascii=False))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+
+    erreurs = []
+    if resultats["dependances_lourdes"]:
+        erreurs.append(f"dépendances lourdes importées au démarrage : {', '.join(resultats['dependances_lourdes'])}")
+    if args.budget_ms is not None and resultats["imports_app_ms"] > args.budget_ms:
+        erreurs.append(f"imports de l'app : {resultats['imports_app_ms']} ms > budget {args.budget_ms} ms")
+    for erreur in erreurs:
+        print(f"ÉCHEC : {erreur}", file=sys.stderr)
+    return 1 if erreurs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
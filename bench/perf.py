@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Mesures de performance de l'app : reruns du script (AppTest), prepare_data, rapport texte et conseils d'hygiène.
+# Les résultats sont écrits en JSON pour comparer deux commits.
+#
+#   python bench/perf.py --json bench_avant.json
+#   python bench/perf.py --json bench_apres.json --filtre hygiene
+#   python bench/perf.py --comparer bench_avant.json bench_apres.json --seuil 0.15
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(RACINE, "streamlit_app.py")
+
+# Environnement isolé : pas de base ni d'index réels, pas d'appel réseau vers CBIP
+os.environ["ANM_DATA_DIR"] = tempfile.mkdtemp(prefix="anm_bench_")
+os.environ.pop("ANM_ARCHIVE_DIR", None)
+os.environ.pop("ANM_EXPORT_DIR", None)
+os.environ["CBIP_API_URL"] = "http://127.0.0.1:9/"
+sys.path.insert(0, RACINE)
+
+# Options de radio qui font apparaître les champs conditionnels
+OPTIONS_DETAILLEES = ["Oui", "Suspicion", "Femme", "Parodontite", "Autre"]
+
+
+# Chronomètre à la manière de pytest-benchmark : échauffement, puis tours mesurés
+def chronometrer(fonction, tours=20, echauffement=2):
+    for _ in range(echauffement):
+        fonction()
+    temps = []
+    for _ in range(tours):
+        debut = time.perf_counter()
+        fonction()
+        temps.append((time.perf_counter() - debut) * 1000)
+    return {
+        "tours": tours,
+        "min_ms": round(min(temps), 3),
+        "median_ms": round(statistics.median(temps), 3),
+        "moyenne_ms": round(statistics.fmean(temps), 3),
+        "ecart_type_ms": round(statistics.stdev(temps), 3) if tours > 1 else 0.0,
+        "max_ms": round(max(temps), 3),
+        "ops_par_s": round(1000 / statistics.fmean(temps), 1),
+    }
+
+
+# Remplit le formulaire comme une visite complète (plusieurs passes pour les champs conditionnels)
+def remplir(at):
+    for _ in range(3):
+        for radio in at.radio:
+            choix = next((option for option in OPTIONS_DETAILLEES if option in radio.options), None)
+            if choix and radio.value != choix:
+                radio.set_value(choix)
+        for multiselect in at.multiselect:
+            if not multiselect.value:
+                multiselect.set_value(multiselect.options[:2])
+        at.run()
+    for text_input in at.text_input:
+        if not text_input.value:
+            text_input.set_value(f"{text_input.label[:12]} 1")
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception)
+    return at
+
+
+def nouvelle_app():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=120).run()
+    if at.exception:
+        raise RuntimeError(at.exception)
+    return at
+
+
+def valeurs_formulaire(at):
+    valeurs = {}
+    for variables in at.session_state["formulaire"].values():
+        valeurs.update(variables)
+    return valeurs
+
+
+# Visite avec les 30 espaces interdentaires renseignés (méthodes variées)
+def visite_30_espaces(valeurs):
+    from visite import (
+        INTERDENTAL_METHODS, MANDIBULAIRE_SPACES, MAXILLAIRE_SPACES, VisitePatient, format_interdental, interdental_entry,
+    )
+
+    visite = VisitePatient.from_mapping(valeurs)
+    methodes = INTERDENTAL_METHODS[:-1]
+    visite.interdental_selection = {
+        espace: interdental_entry([methodes[i % len(methodes)], methodes[(i + 1) % len(methodes)]])
+        for i, espace in enumerate(MAXILLAIRE_SPACES + MANDIBULAIRE_SPACES)
+    }
+    visite.all_interdental_data = {espace: format_interdental(e) for espace, e in visite.interdental_selection.items()}
+    return visite
+
+
+def mesurer(filtre=None, tours=20):
+    from conseils_pdf import TECHNIQUE_TEXTS, generate_hygiene_pdf
+    from sorties import generate_text_report
+    from visite import VisitePatient, build_data
+
+    resultats = {}
+
+    def bench(nom, fonction, **options):
+        if filtre and filtre not in nom:
+            return
+        resultats[nom] = chronometrer(fonction, **options)
+        print(f"{nom:<45} médiane {resultats[nom]['median_ms']:>9.2f} ms", file=sys.stderr)
+
+    at_vide = nouvelle_app()
+    bench("rerun_formulaire_vide", at_vide.run, tours=max(5, tours // 4), echauffement=1)
+    at_rempli = remplir(nouvelle_app())
+    bench("rerun_formulaire_rempli", at_rempli.run, tours=max(5, tours // 4), echauffement=1)
+
+    valeurs = valeurs_formulaire(at_rempli)
+    bench("prepare_data", lambda: build_data(VisitePatient.from_mapping(valeurs)), tours=tours * 10)
+    data = build_data(VisitePatient.from_mapping(valeurs))
+    bench("generate_text_report", lambda: generate_text_report(data), tours=tours * 10)
+    if "generate_text_report" in resultats:
+        resultats["generate_text_report"]["taille_octets"] = len(generate_text_report(data).encode("utf-8"))
+
+    for technique in TECHNIQUE_TEXTS:
+        data_technique = dict(data, **{"IHO Technique de brossage": technique})
+        bench(f"hygiene_pdf[{technique}]", lambda d=data_technique: generate_hygiene_pdf(d), tours=tours)
+    data_30 = build_data(visite_30_espaces(valeurs))
+    bench("hygiene_pdf[30 espaces interdentaires]", lambda: generate_hygiene_pdf(data_30), tours=tours)
+    if "hygiene_pdf[30 espaces interdentaires]" in resultats:
+        resultats["hygiene_pdf[30 espaces interdentaires]"]["taille_octets"] = len(generate_hygiene_pdf(data_30))
+    return resultats
+
+
+def meta():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RACINE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "processeurs": os.cpu_count(),
+    }
+
+
+# Compare les médianes de deux fichiers de résultats ; renvoie la liste des régressions au-delà du seuil
+def comparer(avant, apres, seuil):
+    regressions = []
+    print(f"{'mesure':<45} {'avant':>10} {'après':>10} {'écart':>8}")
+    for nom in sorted(set(avant["resultats"]) | set(apres["resultats"])):
+        a = avant["resultats"].get(nom, {}).get("median_ms")
+        b = apres["resultats"].get(nom, {}).get("median_ms")
+        if a is None or b is None:
+            print(f"{nom:<45} {a if a is not None else '-':>10} {b if b is not None else '-':>10}")
+            continue
+        ecart = (b - a) / a if a else 0.0
+        marque = " ▲" if ecart > seuil else ""
+        print(f"{nom:<45} {a:>10.2f} {b:>10.2f} {ecart:>+8.1%}{marque}")
+        if ecart > seuil:
+            regressions.append(nom)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesures de performance de l'app.")
+    parser.add_argument("--json", help="Fichier où écrire les résultats")
+    parser.add_argument("--filtre", help="Ne lancer que les mesures dont le nom contient ce texte")
+    parser.add_argument("--tours", type=int, default=20, help="Tours mesurés par fonction (reruns : le quart)")
+    parser.add_argument("--comparer", nargs=2, metavar=("AVANT", "APRES"), help="Compare deux fichiers de résultats")
+    parser.add_argument("--seuil", type=float, default=0.15, help="Régression tolérée sur la médiane (0.15 = 15 %%)")
+    args = parser.parse_args(argv)
+
+    if args.comparer:
+        with open(args.comparer[0], encoding="utf-8") as f:
+            avant = json.load(f)
+        with open(args.comparer[1], encoding="utf-8") as f:
+            apres = json.load(f)
+        regressions = comparer(avant, apres, args.seuil)
+        if regressions:
+            print(f"ÉCHEC : {len(regressions)} régression(s) au-delà de {args.seuil:.0%}", file=sys.stderr)
+        return 1 if regressions else 0
+
+    resultats = {"meta": meta(), "resultats": mesurer(args.filtre, args.tours)}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(resultats, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
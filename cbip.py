@@ -0,0 +1,271 @@
+import bisect
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import profilage
+from config import chemin_donnees
+
+# URL de l'API CBIP (à remplacer par l'URL réelle). CBIP_API_URL permet de pointer vers un serveur local.
+CBIP_URL = os.environ.get("CBIP_API_URL", "https://www.cbip.be/fr/")
+CBIP_API_KEY = os.environ.get("CBIP_API_KEY", "VOTRE_CLE_API")  # Remplacez par votre clé API
+CBIP_INDEX_PATH = os.environ.get("CBIP_INDEX_PATH")  # défaut : cbip_index.json dans le dossier de données
+
+# Timeout (connexion, lecture) : une API injoignable ne doit pas bloquer le formulaire 10 s
+CBIP_TIMEOUT = (2, 5)
+# Durée de vie des réponses en cache : longue pour les résultats, courte pour les erreurs
+TTL_RESULTAT = 24 * 3600
+TTL_ERREUR = 60
+TAILLE_CACHE = 512
+# Vérifications en arrière-plan (appels réseau) et suggestions de l'index local
+VERIFICATIONS_SIMULTANEES = 2
+TAILLE_SUGGESTIONS = 8
+
+# Issue d'une interrogation de l'API (voir _interroger_cbip)
+TROUVE, ABSENT, ERREUR = "trouvé", "absent", "erreur"
+
+
+# Cache LRU avec expiration (TTL) par entrée
+class CacheTTL:
+    def __init__(self, taille_max=TAILLE_CACHE):
+        self.taille_max = taille_max
+        self._donnees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def get(self, cle):
+        with self._verrou:
+            entree = self._donnees.get(cle)
+            if entree is None:
+                return None
+            expire_le, valeur = entree
+            if expire_le < time.monotonic():
+                del self._donnees[cle]
+                return None
+            self._donnees.move_to_end(cle)
+            return valeur
+
+    def set(self, cle, valeur, ttl):
+        with self._verrou:
+            self._donnees[cle] = (time.monotonic() + ttl, valeur)
+            self._donnees.move_to_end(cle)
+            while len(self._donnees) > self.taille_max:
+                self._donnees.popitem(last=False)
+
+    def clear(self):
+        with self._verrou:
+            self._donnees.clear()
+
+
+# Index local des médicaments déjà validés, persisté en JSON pour les vérifications hors-ligne.
+# Les noms triés servent d'index de préfixes (recherche par bisect) pour l'autocomplétion.
+class IndexMedicaments:
+    def __init__(self, chemin=None):
+        self._chemin = chemin
+        self._verrou = threading.Lock()
+        self._medicaments = None
+        self._tries = None
+
+    # Chemin résolu au premier accès : importer le module ne crée pas le dossier de données
+    @property
+    def chemin(self):
+        if self._chemin is None:
+            self._chemin = CBIP_INDEX_PATH or chemin_donnees("cbip_index.json")
+        return self._chemin
+
+    def _charger(self):
+        if self._medicaments is None:
+            try:
+                with open(self.chemin, encoding="utf-8") as f:
+                    self._medicaments = json.load(f)
+            except (OSError, ValueError):
+                self._medicaments = {}
+        return self._medicaments
+
+    def get(self, cle):
+        with self._verrou:
+            return self._charger().get(cle)
+
+    def noms(self):
+        with self._verrou:
+            if self._tries is None:
+                self._tries = sorted(self._charger())
+            return self._tries
+
+    # Noms (normalisés) commençant par le préfixe donné, dans l'ordre alphabétique
+    def commencant_par(self, prefixe, limite=TAILLE_SUGGESTIONS):
+        noms = self.noms()
+        debut = bisect.bisect_left(noms, prefixe)
+        trouves = []
+        for nom in noms[debut:debut + limite]:
+            if not nom.startswith(prefixe):
+                break
+            trouves.append(nom)
+        return trouves
+
+    def ajouter(self, cle, donnees):
+        with self._verrou:
+            medicaments = self._charger()
+            medicaments[cle] = donnees
+            self._tries = None
+            # Écriture atomique pour ne jamais laisser un index à moitié écrit
+            temporaire = f"{self.chemin}.{os.getpid()}.tmp"
+            with open(temporaire, "w", encoding="utf-8") as f:
+                json.dump(medicaments, f, ensure_ascii=False)
+            os.replace(temporaire, self.chemin)
+
+
+_cache = CacheTTL()
+_index = IndexMedicaments()
+_session = None
+_session_verrou = threading.Lock()
+_verifications = None
+_en_cours = {}
+_en_cours_verrou = threading.Lock()
+
+
+# Session HTTP partagée : réutilise les connexions TCP/TLS d'une vérification à l'autre.
+# requests n'est importé qu'à la première interrogation de l'API (démarrage de l'app plus rapide).
+def get_session():
+    global _session
+    with _session_verrou:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Authorization"] = f"Bearer {CBIP_API_KEY}"
+            _session = session
+        return _session
+
+
+# Fonction pour normaliser un nom de médicament (clé de cache et d'index)
+def normaliser_nom(nom_medicament):
+    nom = unicodedata.normalize("NFKD", nom_medicament.strip().lower())
+    return " ".join("".join(c for c in nom if not unicodedata.combining(c)).split())
+
+
+# Fonction pour interroger l'API : (TROUVE, données), (ABSENT, message) ou (ERREUR, message)
+@profilage.chronometre("cbip.interroger_api")
+def _interroger_cbip(nom_medicament):
+    import requests
+
+    try:
+        response = get_session().get(CBIP_URL, params={"nom": nom_medicament}, timeout=CBIP_TIMEOUT)
+        if response.status_code == 200:
+            data = response.json()
+            if data:  # Si le médicament est trouvé
+                return TROUVE, data
+            return ABSENT, "Médicament non trouvé dans CBIP."
+        return ERREUR, f"Erreur API CBIP : {response.status_code}"
+    except ValueError:
+        return ERREUR, "Réponse CBIP illisible."
+    except requests.exceptions.RequestException as e:
+        return ERREUR, f"Erreur de connexion à CBIP : {str(e)}"
+
+
+# Fonction pour vérifier un médicament : cache mémoire, puis index local, puis API CBIP
+def verifier_medicament(nom_medicament):
+    cle = normaliser_nom(nom_medicament)
+    if not cle:
+        return False, "Nom de médicament vide."
+
+    resultat = _cache.get(cle)
+    if resultat is not None:
+        return resultat
+
+    donnees = _index.get(cle)
+    if donnees is not None:
+        resultat = (True, donnees)
+        _cache.set(cle, resultat, TTL_RESULTAT)
+        return resultat
+
+    statut, donnees = _interroger_cbip(nom_medicament)
+    resultat = (statut == TROUVE, donnees)
+    if statut == TROUVE:
+        _index.ajouter(cle, donnees)
+        _cache.set(cle, resultat, TTL_RESULTAT)
+    elif statut == ABSENT:
+        _cache.set(cle, resultat, TTL_RESULTAT)
+    else:
+        # Les erreurs réseau sont mises en cache peu de temps pour ne pas bloquer chaque rerun
+        _cache.set(cle, resultat, TTL_ERREUR)
+    return resultat
+
+
+# Fonction pour un résultat déjà connu (cache mémoire ou index local), sans appel réseau ; None sinon
+def resultat_local(nom_medicament):
+    cle = normaliser_nom(nom_medicament)
+    if not cle:
+        return False, "Nom de médicament vide."
+    resultat = _cache.get(cle)
+    if resultat is None:
+        donnees = _index.get(cle)
+        if donnees is not None:
+            resultat = (True, donnees)
+            _cache.set(cle, resultat, TTL_RESULTAT)
+    return resultat
+
+
+def _executeur():
+    global _verifications
+    with _en_cours_verrou:
+        if _verifications is None:
+            _verifications = ThreadPoolExecutor(max_workers=VERIFICATIONS_SIMULTANEES, thread_name_prefix="cbip")
+        return _verifications
+
+
+# Fonction pour vérifier un médicament sans bloquer le formulaire : renvoie le résultat s'il est connu localement,
+# sinon lance (une seule fois par nom, toutes sessions confondues) l'appel à l'API en arrière-plan et renvoie None
+def verifier_en_arriere_plan(nom_medicament):
+    resultat = resultat_local(nom_medicament)
+    if resultat is not None:
+        return resultat
+    cle = normaliser_nom(nom_medicament)
+    executeur = _executeur()
+    with _en_cours_verrou:
+        future = _en_cours.get(cle)
+        nouvelle = future is None or future.cancelled()
+        if nouvelle:
+            future = _en_cours[cle] = executeur.submit(verifier_medicament, nom_medicament)
+    if nouvelle:
+        future.add_done_callback(lambda f: _oublier(cle, f))
+    if future.done() and not future.cancelled():
+        return future.result()
+    return None
+
+
+def _oublier(cle, future):
+    with _en_cours_verrou:
+        if _en_cours.get(cle) is future:
+            del _en_cours[cle]
+
+
+# Fonction pour abandonner la vérification d'un nom qui n'est plus saisi (si elle n'a pas encore commencé)
+def annuler_verification(nom_medicament):
+    with _en_cours_verrou:
+        future = _en_cours.get(normaliser_nom(nom_medicament))
+    if future is not None:
+        future.cancel()
+
+
+# Noms des médicaments de l'index local, pour l'autocomplétion du formulaire
+def noms_connus():
+    return [nom.capitalize() for nom in _index.noms()]
+
+
+# Fonction pour proposer des noms connus proches d'une saisie (même début de nom)
+def suggestions(nom_medicament, limite=TAILLE_SUGGESTIONS):
+    cle = normaliser_nom(nom_medicament)
+    while cle:
+        trouves = _index.commencant_par(cle, limite)
+        if trouves:
+            return [nom.capitalize() for nom in trouves]
+        cle = cle[:-1] if len(cle) > 3 else ""
+    return []
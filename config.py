@@ -0,0 +1,23 @@
+import os
+
+# Dossier local pour les données persistantes de l'application (index, base, journaux)
+DATA_DIR = os.environ.get("ANM_DATA_DIR", os.path.join(os.path.expanduser("~"), ".anm_easy"))
+
+# Dossier d'archivage optionnel des rapports générés (aucune écriture disque si non défini)
+ARCHIVE_DIR = os.environ.get("ANM_ARCHIVE_DIR") or None
+
+# Dossier optionnel des exports JSONL quotidiens des visites enregistrées (voir export.py)
+EXPORT_DIR = os.environ.get("ANM_EXPORT_DIR") or None
+
+# Mesure des temps de l'app et panneau de profilage dans la barre latérale (voir profilage.py)
+PROFILAGE = os.environ.get("ANM_PROFILAGE", "") not in ("", "0")
+
+# Nombre de processus pour le rendu des PDF, partagés par toutes les sessions (voir travaux.py)
+PDF_WORKERS = int(os.environ.get("ANM_PDF_WORKERS") or 0) or min(4, os.cpu_count() or 1)
+
+
+# Fonction pour obtenir un chemin dans le dossier de données (créé au besoin)
+def chemin_donnees(*parties):
+    chemin = os.path.join(DATA_DIR, *parties)
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    return chemin
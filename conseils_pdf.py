@@ -0,0 +1,263 @@
+import copy
+from functools import lru_cache, partial
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import Paragraph, SimpleDocTemplate
+
+from visite import methode_interdentaire
+
+# Registre des textes de conseils : chargé une seule fois à l'import, partagé par tous les PDF
+TECHNIQUE_TEXTS = {
+    "Bass": """Méthode Bass
+Pour un brossage optimal avec la méthode Bass, placez votre brosse à dents en l’inclinant à 45° vers la gencive. Ensuite, effectuez de petits mouvements de va-et-vient très courts, presque des vibrations, sans bouger la brosse d’une dent à l’autre. Cette technique permet aux poils de bien pénétrer sous la gencive et d’éliminer la plaque dentaire.
+Veillez à brosser toutes les faces des dents :
+<br/>- Face externe : Appliquez la brosse sur un groupe de dents et réalisez les petites vibrations.
+<br/>- Face interne : Tenez la brosse droite et réalisez le même mouvement dent par dent.
+<br/>- Face masticatoire : Effectuez des mouvements de va-et-vient pour bien éliminer les résidus alimentaires.
+<br/>Un brossage efficace doit durer au moins deux minutes, matin et soir, en veillant à ne pas appuyer trop fort afin de ne pas abîmer l’émail des dents et la gencive.""",
+    "Bass modifié": """Méthode Bass modifiée
+La méthode Bass modifiée suit le même principe que la méthode Bass, mais avec une étape supplémentaire. Après avoir effectué les petits mouvements vibratoires, terminez par un balayage vers le bas pour les dents du haut et vers le haut pour celles du bas. Ce geste permet de mieux éliminer la plaque dentaire et les résidus alimentaires.
+Veillez à brosser toutes les faces des dents :
+<br/>- Face externe : Réalisez d’abord les vibrations, puis effectuez le balayage.
+<br/>- Face interne : Maintenez la brosse droite et brossez chaque dent une à une.
+<br/>- Face masticatoire : Effectuez des mouvements de va-et-vient pour bien nettoyer les surfaces.
+<br/>Un brossage efficace doit durer au moins deux minutes, matin et soir, en veillant à ne pas appuyer trop fort.""",
+    "45° Circulaire": """Méthode 45° Circulaire
+Avec la méthode 45° Circulaire, placez la brosse à 45° contre la gencive et la dent. Ensuite, effectuez de petits cercles réguliers, en veillant à ne pas appuyer trop fort pour éviter d’irriter la gencive. Cette méthode est idéale pour nettoyer les espaces interdentaires.
+Veillez à brosser toutes les faces des dents :
+<br/>- Face externe : Réalisez des cercles réguliers tout le long de l’arcade dentaire.
+<br/>- Face interne : Tenez la brosse droite pour suivre la courbure des dents et effectuez les mêmes cercles.
+<br/>- Face masticatoire : Effectuez des mouvements de va-et-vient pour bien éliminer les résidus alimentaires.
+<br/>Un brossage efficace doit durer au moins deux minutes, matin et soir, en veillant à ne pas appuyer trop fort.""",
+    "45° Circulaire chassé": """Méthode 45° Circulaire chassé
+La méthode 45° Circulaire chassé commence comme la méthode 45° Circulaire, avec de petits cercles. Mais à la fin de chaque série de cercles, la brosse est légèrement tournée vers le bas ou vers le haut pour "chasser" la plaque dentaire hors des espaces interdentaires.
+Veillez à brosser toutes les faces des dents :
+<br/>- Face externe : Réalisez des cercles suivis du mouvement de balayage.
+<br/>- Face interne : Maintenez la brosse droite et appliquez la même technique.
+<br/>- Face masticatoire : Effectuez des mouvements de va-et-vient pour bien éliminer les résidus alimentaires.
+<br/>Un brossage efficace doit durer au moins deux minutes, matin et soir, en veillant à ne pas appuyer trop fort.""",
+    "Rolling stroke ou Roll": """Méthode Rolling Stroke (ou Roll)
+La méthode Rolling Stroke consiste à faire rouler la brosse sur la surface des dents. Placez-la à plat contre la gencive et la dent, puis effectuez un mouvement de rotation vers le bas pour les dents du haut et vers le haut pour celles du bas. Répétez ce mouvement plusieurs fois.
+Veillez à brosser toutes les faces des dents :
+<br/>- Face externe : Effectuez le mouvement de roulage progressivement sur toute l’arcade.
+<br/>- Face interne : Tenez la brosse droite et appliquez la même technique, dent par dent.
+<br/>- Face masticatoire : Effectuez des mouvements de va-et-vient pour éliminer les débris alimentaires.
+<br/>Un brossage efficace doit durer au moins deux minutes, matin et soir, en veillant à ne pas appuyer trop fort.""",
+    "Stillman’s": """Méthode Stillman’s
+Pour la méthode Stillman’s, tenez la brosse à 45° (légèrement inclinée) vers la gencive et appliquez une légère pression jusqu'à ce que la gencive blanchisse légèrement. Effectuez de petits mouvements de va-et-vient avec une rotation d'un quart de tour et répétez 3 à 4 fois.
+Veillez à brosser toutes les faces des dents :
+<br/>- Face externe : Appliquez la brosse sur un groupe de dents et réalisez les petites vibrations.
+<br/>- Face interne : Tenez la brosse droite et réalisez le même mouvement, dent par dent.
+<br/>- Face masticatoire : Effectuez des mouvements de va-et-vient pour éliminer les résidus.
+<br/>Un brossage efficace doit durer au moins deux minutes, matin et soir, en veillant à ne pas appuyer trop fort.""",
+    "Charter’s": """Méthode Charter’s
+La méthode Charter’s consiste à placer la brosse à 45°, avec les poils orientés vers les cuspides (pointes des dents). Appliquez une légère pression sur la gencive et la base de la dent jusqu'à ce que la gencive blanchisse légèrement, puis effectuez de petits mouvements de pression et de relâchement.
+Veillez à brosser toutes les faces des dents :
+<br/>- Face externe : Appliquez la brosse sur un groupe de dents et réalisez les petites vibrations.
+<br/>- Face interne : Tenez la brosse droite et réalisez le même mouvement, dent par dent.
+<br/>- Face masticatoire : Effectuez des mouvements de va-et-vient pour éliminer les résidus.
+<br/>Un brossage efficace doit durer au moins deux minutes, matin et soir, en veillant à ne pas appuyer trop fort.""",
+    "90° Circulaire": """Méthode 90° Circulaire
+La méthode 90° Circulaire consiste à tenir la brosse perpendiculaire aux dents (90°) et à réaliser de petits cercles réguliers sur chaque dent, permettant un nettoyage efficace tout en préservant l’émail.
+Veillez à brosser toutes les faces des dents :
+<br/>- Face externe : Réalisez des cercles réguliers sur toute l’arcade.
+<br/>- Face interne : Tenez la brosse droite et effectuez les mêmes cercles.
+<br/>- Face masticatoire : Réalisez des cercles pour éliminer les débris.
+<br/>Un brossage efficace doit durer au moins deux minutes, matin et soir, en veillant à ne pas appuyer trop fort.""",
+    "Brossage électrique": """Brossage avec une brosse électrique
+Avec une brosse électrique, placez la brosse sur chaque dent et laissez-la agir pendant 1 à 3 secondes sans bouger, puis passez à la dent suivante.
+Veillez à brosser toutes les faces des dents :
+<br/>- Face externe : Laissez la brosse vibrer sur chaque dent.
+<br/>- Face interne : Suivez la courbe des dents.
+<br/>- Face masticatoire : Laissez la brosse vibrer quelques secondes pour éliminer la plaque.
+<br/>Un brossage efficace doit durer au moins deux minutes, matin et soir, en veillant à ne pas appuyer trop fort."""
+}
+
+INTERDENTAL_INSTRUCTIONS = {
+    "Fil dentaire": """Utilisation du fil dentaire
+Pour utiliser le fil dentaire de manière efficace, commencez par entourer environ 30 cm de fil autour de votre majeur en enroulant une petite quantité sur chaque doigt (index et pouce) pour que le fil soit tendu. Tenez-le fermement et guidez-le entre les dents. Déplacez-le sous la gencive et autour de chaque dent pour éliminer la plaque.
+Effectuez des mouvements de cisaillement pour entrer et sortir entre les dents.
+Utilisez-le avant le brossage, de préférence tous les soirs.""",
+    "Porte fil": """Utilisation du porte-fil dentaire
+Le porte-fil est une petite poignée avec un fil tendu, facilitant l'accès aux espaces difficiles. Placez le fil sous le porte-fil et tendez-le entre les dents sans le couper. Glissez-le sous la gencive en effectuant des mouvements de cisaillement.
+Utilisez-le avant le brossage, de préférence tous les soirs.""",
+    "Brossettes interdentaires": """Utilisation des brossettes interdentaires
+Les brossettes interdentaires sont de petites brosses conçues pour nettoyer les espaces entre les dents. Choisissez une brossette de la taille appropriée à vos espaces interdentaires. Tenez-la comme un pinceau et insérez-la doucement entre les dents, en la déplaçant pour nettoyer la zone sous la gencive et autour de chaque dent. Il est recommandé de faire plusieurs aller-retours pour éliminer toute plaque ou débris.
+Lors de l’insertion, utilisez des mouvements de cisaillement pour l'insérer et la retirer en douceur.
+Après chaque utilisation, laissez sécher la brossette à l’air libre (sans capuchon) et remplacez-la en moyenne tous les 10 jours ou dès que les poils sont abîmés.
+Utilisez-la avant le brossage, de préférence tous les soirs.""",
+    "Soft pick": """Utilisation des Soft Picks
+Les Soft Picks, dotés de picots en caoutchouc, permettent de nettoyer les espaces interdentaires de manière douce. Insérez délicatement un Soft Pick entre les dents et effectuez des mouvements de cisaillement pour l'introduire et le retirer sans endommager les gencives.
+Utilisez-le avant le brossage, idéalement tous les soirs."""
+}
+
+
+# Textes fixes des autres sections
+TEXTE_TITRE = "Conseils d’hygiène bucco-dentaire dans les cabinets cabinets dentaires Bettens"
+TEXTE_ELMEX = "L’elmex gel, trouvable en pharmacie, est à utiliser 1x par semaine après le brossage. Appliquez environ 1g sur le doigt, étalez-le sur toutes les dents et laissez agir 2 minutes avant de rincer."
+TEXTE_INTERDENTAIRE = "Il est conseillé d’utiliser les moyens interdentaires le soir. Voici les instructions d'utilisation selon les méthodes sélectionnées :"
+TEXTES_CHANGEMENT_BROSSE = {
+    "Electrique": "Je vous conseille d'envisager d'acheter une brosse à dents électrique.",
+    "Manuel": "Je vous conseille de retourner à une méthode de brossage manuel.",
+}
+
+# Styles propres au document (le style 'Normal' partagé de ReportLab n'est plus modifié)
+STYLE_NORMAL = ParagraphStyle(name='ConseilsNormal', fontSize=10, leading=12, textColor=colors.black, spaceAfter=5)
+STYLE_BOLD = ParagraphStyle(
+    name='ConseilsBold',
+    fontSize=12,
+    leading=14,
+    textColor=colors.black,
+    spaceAfter=5,
+)
+
+WIDTH, HEIGHT = letter
+MARGE_X = 72
+MARGE_HAUT = 40
+MARGE_BAS = 56
+TEXTE_PIED = "Les cabinets dentaires Bettens"
+
+
+def _balisage(text):
+    # Remplacer chaque "- " par un retour à la ligne suivi de "-" pour forcer le saut de ligne.
+    # Utilisation de <br/> pour un meilleur rendu avec ReportLab
+    return text.replace("- ", "<br/>- ")
+
+
+# Paragraphe d'un texte fixe, analysé une seule fois ; chaque document en reçoit une copie superficielle
+# (le balisage analysé est partagé, la mise en page et le découpage entre pages sont propres au document)
+@lru_cache(maxsize=256)
+def bloc_modele(text, bold):
+    return Paragraph(_balisage(text), STYLE_BOLD if bold else STYLE_NORMAL)
+
+
+def _paragraphe(text, bold=False, modele=False):
+    if modele:
+        return copy.copy(bloc_modele(text, bold))
+    # Texte saisi dans le formulaire : échappé pour ne pas être lu comme du balisage
+    return Paragraph(_balisage(escape(str(text))), STYLE_BOLD if bold else STYLE_NORMAL)
+
+
+# Moyens interdentaires cités dans les espaces interdentaires (mots-clés), dans l'ordre du registre
+def _methodes_interdentaires(lignes):
+    selected_methods = set()
+    for line in lignes:
+        lower_line = line.lower()
+        if "fil dentaire" in lower_line:
+            selected_methods.add("Fil dentaire")
+        if "porte fil" in lower_line:
+            selected_methods.add("Porte fil")
+        if "brossettes" in lower_line:
+            selected_methods.add("Brossettes interdentaires")
+        if "soft pick" in lower_line:
+            selected_methods.add("Soft pick")
+    return [method for method in INTERDENTAL_INSTRUCTIONS if method in selected_methods]
+
+
+# Fonction pour construire les flowables des conseils d'hygiène à partir du dictionnaire prepare_data().
+# Les paragraphes sont coupés entre les pages par SimpleDocTemplate, quelle que soit leur longueur.
+def build_hygiene_flowables(data):
+    story = [
+        _paragraphe(TEXTE_TITRE, bold=True, modele=True),
+        _paragraphe("Date d'aujourd'hui: " + str(data.get("Date d'aujourd'hui", "")), bold=True),
+        _paragraphe(f"Nom et Prénom: {data.get('Nom et Prénom', '')}", bold=True),
+        _paragraphe(f"Prochain Rendez-vous: {data.get('Prochain Rendez-vous', '')}", bold=True),
+        _paragraphe(f"Praticien: {data.get('Praticien', '')}", bold=True),
+    ]
+
+    # Section Techniques de brossage
+    if data.get("IHO Technique de brossage"):
+        story.append(_paragraphe("Méthode de brossage adaptée à vos besoins:", bold=True, modele=True))
+        technique = data.get("IHO Technique de brossage", "")
+        if technique in TECHNIQUE_TEXTS:
+            story.append(_paragraphe(TECHNIQUE_TEXTS[technique], modele=True))
+        else:
+            story.append(_paragraphe(data.get("Autre technique de brossage", "")))
+
+        # Bloc pour "Conseillé de changé de méthode de brossage"
+        type_brosse = data.get("IHO Conseillé de changé de méthode de brossage")
+        if type_brosse in TEXTES_CHANGEMENT_BROSSE:
+            story.append(_paragraphe("Changement de brosse à dents:", bold=True, modele=True))
+            story.append(_paragraphe(TEXTES_CHANGEMENT_BROSSE[type_brosse], modele=True))
+
+    # Section Bain de bouche
+    if data.get("Bain de bouche"):
+        story.append(_paragraphe("Bain de bouche:", bold=True, modele=True))
+        if "CHX" in data.get("Bain de bouche", ""):
+            story.append(_paragraphe(f"Je vous conseille d’utiliser un bain de bouche perio Aid. 0.12% trouvable en pharmacie pendant une durée limitée de {data.get('CHX - Combien de jours')}."))
+        if "O2" in data.get("Bain de bouche", ""):
+            story.append(_paragraphe(f"Je vous conseille d’utiliser un bain de bouche à base d’eau oxygénée trouvable en pharmacie pendant une durée limitée de {data.get('O2 - Combien de jours')}."))
+        if "Autre" in data.get("Bain de bouche", ""):
+            story.append(_paragraphe(data.get("Autre bain de bouche", "")))
+
+    # Section Conseil de dentifrice
+    if data.get("Conseil de dentifrice"):
+        story.append(_paragraphe("Conseil de dentifrice:", bold=True, modele=True))
+        story.append(_paragraphe(data.get("Conseil de dentifrice", "")))
+
+    # Section Autre produits d'hygiène
+    hygiene_products = data.get("Produits d'hygiène")
+    if hygiene_products:
+        story.append(_paragraphe("Autre produits d'hygiène:", bold=True, modele=True))
+        if "Elmex Gel" in hygiene_products:
+            story.append(_paragraphe(TEXTE_ELMEX, modele=True))
+        if "Autre" in hygiene_products:
+            story.append(_paragraphe(data.get("Autre produits d'hygiène", "")))
+
+    # Section Espaces interdentaire : un paragraphe pour tous les espaces, regroupés par moyen, marque et taille
+    moyens = data.get("Moyens interdentaires")
+    if isinstance(moyens, dict) and moyens:
+        story.append(_paragraphe("Espaces interdentaire:", bold=True, modele=True))
+        story.append(_paragraphe(TEXTE_INTERDENTAIRE, modele=True))
+        methodes = {methode_interdentaire(libelle) for libelle in moyens}
+        for method in INTERDENTAL_INSTRUCTIONS:
+            if method in methodes:
+                story.append(_paragraphe(INTERDENTAL_INSTRUCTIONS[method], modele=True))
+        story.append(Paragraph(
+            "<br/>".join(f"<b>{escape(libelle)}</b> : {escape(espaces)}" for libelle, espaces in moyens.items()), STYLE_NORMAL,
+        ))
+    elif data.get("Espaces Interdentaires Maxillaire") or data.get("Espaces Interdentaires Mandibulaire"):
+        # Données sans regroupement (rapports importés, fichiers du traitement par lots) : une ligne par espace
+        story.append(_paragraphe("Espaces interdentaire:", bold=True, modele=True))
+        story.append(_paragraphe(TEXTE_INTERDENTAIRE, modele=True))
+        maxillaire = data.get("Espaces Interdentaires Maxillaire", "").split("\n")
+        mandibulaire = data.get("Espaces Interdentaires Mandibulaire", "").split("\n")
+        for method in _methodes_interdentaires(maxillaire + mandibulaire):
+            story.append(_paragraphe(INTERDENTAL_INSTRUCTIONS[method], modele=True))
+        for line in maxillaire + mandibulaire:
+            if line.strip() and not line.endswith(": Aucun"):
+                story.append(_paragraphe(line))
+    return story
+
+
+# En-tête (pages suivantes : le titre est déjà sur la première) et pied de page avec numéro, sur chaque page
+def _en_tete_et_pied(c, doc, nom_prenom=None, en_tete=True):
+    c.saveState()
+    c.setFont("Helvetica", 8)
+    c.setFillColor(colors.grey)
+    if en_tete:
+        c.drawString(MARGE_X, HEIGHT - 24, "Conseils d’hygiène bucco-dentaire" + (f" - {nom_prenom}" if nom_prenom else ""))
+    c.drawString(MARGE_X, 30, TEXTE_PIED)
+    c.drawRightString(WIDTH - MARGE_X, 30, f"Page {doc.page}")
+    c.restoreState()
+
+
+#Fonction pour générer Conseils Patients (sans filename : rendu en mémoire, retourne les octets du PDF)
+def generate_hygiene_pdf(data, filename=None):
+    sortie = filename if filename is not None else BytesIO()
+    doc = SimpleDocTemplate(
+        sortie, pagesize=letter, leftMargin=MARGE_X, rightMargin=MARGE_X, topMargin=MARGE_HAUT, bottomMargin=MARGE_BAS,
+        title="Conseils d’hygiène bucco-dentaire", author=TEXTE_PIED,
+    )
+    nom_prenom = data.get("Nom et Prénom")
+    doc.build(
+        build_hygiene_flowables(data),
+        onFirstPage=partial(_en_tete_et_pied, en_tete=False),
+        onLaterPages=partial(_en_tete_et_pied, nom_prenom=nom_prenom),
+    )
+    if filename is None:
+        return sortie.getvalue()
@@ -0,0 +1,156 @@
+# Table des dents (numérotation FDI) et registre plat des constats par quadrant
+
+QUADRANTS = {
+    "Q1": ["18", "17", "16", "15", "14", "13", "12", "11"],
+    "Q2": ["28", "27", "26", "25", "24", "23", "22", "21"],
+    "Q3": ["38", "37", "36", "35", "34", "33", "32", "31"],
+    "Q4": ["48", "47", "46", "45", "44", "43", "42", "41"],
+}
+DENTS = [dent for dents in QUADRANTS.values() for dent in dents]
+QUADRANT_DENT = {dent: q for q, dents in QUADRANTS.items() for dent in dents}
+
+CONDITIONS = [
+    "Dent manquante", "Suspicion de carie", "Déminéralisation", "Composite", "Amalgamme", "Implant",
+    "Couronne sur dent", "Bridge", "Autre",
+]
+# Constats localisés par surface, et constats sur la dent entière avec un état OK/Risque
+CONDITIONS_SURFACES = ["Suspicion de carie", "Déminéralisation", "Composite", "Amalgamme"]
+CONDITIONS_ETAT = ["Implant", "Couronne sur dent", "Bridge"]
+ETATS = ["OK", "Risque"]
+# Préfixes courts pour les clés de widgets
+CONDITION_SLUGS = {
+    "Dent manquante": "dent_manquante", "Suspicion de carie": "suspicion_carie", "Déminéralisation": "demineralisation",
+    "Composite": "composite", "Amalgamme": "amalgamme", "Implant": "implant", "Couronne sur dent": "couronne",
+    "Bridge": "bridge", "Autre": "autre",
+}
+
+# "Dent" désigne la dent entière (dent manquante, implant, couronne, bridge)
+SURFACES = ["Dent", "M", "D", "V", "O", "P", "L", "Collet"]
+
+_INDEX_DENT = {dent: i for i, dent in enumerate(DENTS)}
+_INDEX_SURFACE = {surface: i for i, surface in enumerate(SURFACES)}
+_INDEX_CONDITION = {condition: i for i, condition in enumerate(CONDITIONS)}
+_N_SURFACES = len(SURFACES)
+_N_CONDITIONS = len(CONDITIONS)
+
+# Valeurs stockées dans la grille
+ABSENT, PRESENT, RISQUE = 0, 1, 2
+
+
+# Fonction pour obtenir les surfaces proposées pour un quadrant (palatin en haut, lingual en bas)
+def surfaces_quadrant(q):
+    face = "P" if q in ("Q1", "Q2") else "L"
+    return ["M", "D", "V", "O", face, "Collet", "Préciser"]
+
+
+# Registre des constats : une grille dent × surface × condition dans un bytearray,
+# plus les textes libres (précisions, risques, vérification) dans un petit dictionnaire
+class Constats:
+    __slots__ = ("grille", "notes", "autres")
+
+    def __init__(self):
+        self.grille = bytearray(len(DENTS) * _N_SURFACES * _N_CONDITIONS)
+        self.notes = {}
+        self.autres = {}
+
+    @staticmethod
+    def _position(dent, surface, condition):
+        return (_INDEX_DENT[dent] * _N_SURFACES + _INDEX_SURFACE[surface]) * _N_CONDITIONS + _INDEX_CONDITION[condition]
+
+    def marquer(self, dent, condition, surface="Dent", valeur=PRESENT):
+        self.grille[self._position(dent, surface, condition)] = valeur
+
+    def valeur(self, dent, condition, surface="Dent"):
+        return self.grille[self._position(dent, surface, condition)]
+
+    def noter(self, dent, condition, cle, texte):
+        self.notes[(dent, condition, cle)] = texte
+
+    def noter_quadrant(self, q, texte):
+        self.autres[q] = texte
+
+    def __bool__(self):
+        return any(self.grille) or bool(self.notes) or bool(self.autres)
+
+    # Itère sur les constats présents : (dent, surface, condition, valeur)
+    def __iter__(self):
+        for position, valeur in enumerate(self.grille):
+            if valeur:
+                dent_surface, i_condition = divmod(position, _N_CONDITIONS)
+                i_dent, i_surface = divmod(dent_surface, _N_SURFACES)
+                yield DENTS[i_dent], SURFACES[i_surface], CONDITIONS[i_condition], valeur
+
+    # Fonction pour reconstruire le dictionnaire d'un quadrant au format des rapports (Q1–Q4)
+    def details_quadrant(self, q, conditions=None):
+        dents = QUADRANTS[q]
+        conditions = conditions if conditions is not None else CONDITIONS
+        details = {}
+        if "Autre" in conditions and q in self.autres:
+            details["Autre"] = self.autres[q]
+        if "Dent manquante" in conditions:
+            details["Dent manquante"] = [dent for dent in dents if self.valeur(dent, "Dent manquante")]
+        for condition in CONDITIONS_SURFACES:
+            if condition not in conditions:
+                continue
+            details[condition] = {}
+            for dent in dents:
+                if not self.valeur(dent, condition):
+                    continue
+                surfaces = {}
+                for surface in surfaces_quadrant(q):
+                    if surface == "Préciser":
+                        if (dent, condition, "Préciser") in self.notes:
+                            surfaces["Préciser"] = self.notes[(dent, condition, "Préciser")]
+                    elif self.valeur(dent, condition, surface):
+                        surfaces[surface] = "Non"
+                if condition == "Suspicion de carie":
+                    surfaces["Vérifier par le dentiste"] = self.notes.get((dent, condition, "Vérifier par le dentiste"), "Oui")
+                details[condition][dent] = surfaces
+        for condition in CONDITIONS_ETAT:
+            if condition not in conditions:
+                continue
+            details[condition] = {}
+            for dent in dents:
+                etat = self.valeur(dent, condition)
+                if etat == RISQUE:
+                    details[condition][dent] = {"État": "Risque", "Risque": self.notes.get((dent, condition, "Risque"), "")}
+                elif etat:
+                    details[condition][dent] = {"État": "OK"}
+        return details
+
+    # Fonction inverse : remplit le registre à partir du dictionnaire d'un quadrant (rapports, import)
+    def charger_quadrant(self, q, details):
+        for condition, valeur in (details or {}).items():
+            if condition == "Autre":
+                self.noter_quadrant(q, valeur)
+            elif condition == "Dent manquante":
+                for dent in valeur:
+                    if dent in _INDEX_DENT:
+                        self.marquer(dent, condition)
+            elif condition in CONDITIONS_SURFACES:
+                for dent, surfaces in valeur.items():
+                    if dent not in _INDEX_DENT:
+                        continue
+                    self.marquer(dent, condition)
+                    for surface, texte in surfaces.items():
+                        if surface in _INDEX_SURFACE:
+                            self.marquer(dent, condition, surface)
+                        else:
+                            self.noter(dent, condition, surface, texte)
+            elif condition in CONDITIONS_ETAT:
+                for dent, etat in valeur.items():
+                    if dent not in _INDEX_DENT:
+                        continue
+                    risque = etat.get("État") == "Risque"
+                    self.marquer(dent, condition, valeur=RISQUE if risque else PRESENT)
+                    if risque:
+                        self.noter(dent, condition, "Risque", etat.get("Risque", ""))
+        return self
+
+    @classmethod
+    def depuis_rapport(cls, data):
+        constats = cls()
+        for q in QUADRANTS:
+            if isinstance(data.get(q), dict):
+                constats.charger_quadrant(q, data[q])
+        return constats
@@ -0,0 +1,53 @@
+from datetime import date, datetime, time
+
+# Instantané JSON de l'état des widgets (st.session_state) pour enregistrer puis recharger un formulaire.
+# Seules les valeurs simples sont gardées : textes, nombres, listes de textes, dates et heures.
+
+# Clés de session qui ne sont pas des champs du formulaire
+CLES_EXCLUES = {"formulaire", "documents", "generated_text", "editable_text", "visite_chargee", "medicament_en_verification",
+                "alertes_anamnese", "journal", "brouillon_repris", "messages_documents"}
+PREFIXES_EXCLUS = ("telecharger_", "interdental_", "profilage_", "agenda_", "charger_")
+
+
+def _encoder(valeur):
+    if valeur is None or isinstance(valeur, (str, bool, int, float)):
+        return valeur
+    if isinstance(valeur, datetime):
+        return {"__datetime__": valeur.isoformat()}
+    if isinstance(valeur, date):
+        return {"__date__": valeur.isoformat()}
+    if isinstance(valeur, time):
+        return {"__time__": valeur.isoformat()}
+    if isinstance(valeur, (list, tuple)) and all(isinstance(v, (str, int, float)) for v in valeur):
+        return list(valeur)
+    raise TypeError(type(valeur).__name__)
+
+
+def decoder(valeur):
+    if isinstance(valeur, dict):
+        if "__datetime__" in valeur:
+            return datetime.fromisoformat(valeur["__datetime__"])
+        if "__date__" in valeur:
+            return date.fromisoformat(valeur["__date__"])
+        if "__time__" in valeur:
+            return time.fromisoformat(valeur["__time__"])
+    return valeur
+
+
+# Fonction pour prendre un instantané des widgets du formulaire (dictionnaire sérialisable en JSON)
+def instantane(session_state):
+    etat = {}
+    for cle in list(session_state.keys()):
+        if not isinstance(cle, str) or cle in CLES_EXCLUES or cle.startswith(PREFIXES_EXCLUS):
+            continue
+        try:
+            etat[cle] = _encoder(session_state[cle])
+        except TypeError:
+            continue
+    return etat
+
+
+# Fonction pour réappliquer un instantané dans st.session_state (à appeler depuis un callback)
+def restaurer(session_state, etat):
+    for cle, valeur in etat.items():
+        session_state[cle] = decoder(valeur)
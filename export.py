@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from datetime import date, datetime
+
+import config
+from stockage import date_iso, parcourir_visites
+from visite import CLES_RAPPORT, COLONNES_MESURES, mesures_visite
+
+# Exports structurés des visites pour l'analyse : JSON (une visite par ligne, ajout quotidien) et Parquet (colonnes).
+# Chaque enregistrement porte la version du schéma ; les valeurs imbriquées (Q1–Q4, usures) restent du JSON natif
+# au lieu du repr Python des rapports texte.
+#
+#   python export.py -o visites_2025.parquet --depuis 2025-01-01 --jusqua 2025-12-31
+#   python export.py exports/visites_2025-*.jsonl -o visites_2025.parquet
+#
+# Historique du schéma :
+#   1 : enveloppe {schema, schema_version, visite_id, num_patient, date_visite, donnees, mesures}
+#   2 : donnees["Moyens interdentaires"] (espaces regroupés par moyen, marque et taille), colonne Parquet du même nom
+
+SCHEMA = "anm-easy/visite"
+SCHEMA_VERSION = 2
+TAILLE_LOT = 5000  # lignes par groupe Parquet
+
+_verrou_jsonl = threading.Lock()
+
+
+# Fonction pour construire l'enregistrement exporté d'une visite (données au format prepare_data)
+def enregistrement(data, visite_id=None):
+    return {
+        "schema": SCHEMA,
+        "schema_version": SCHEMA_VERSION,
+        "visite_id": visite_id,
+        "num_patient": data.get("Numéro du Patient"),
+        "date_visite": date_iso(data.get("Date d'aujourd'hui")),
+        "donnees": data,
+        "mesures": dict(zip(COLONNES_MESURES, mesures_visite(data))),
+    }
+
+
+# Fonction pour ajouter une visite au fichier JSONL du jour (EXPORT_DIR). Retourne le chemin ou None.
+# Une seule écriture en mode ajout par visite : plusieurs sessions peuvent écrire dans le même fichier.
+def ajouter_jsonl(record, export_dir=None, jour=None):
+    export_dir = export_dir or config.EXPORT_DIR
+    if not export_dir:
+        return None
+    os.makedirs(export_dir, exist_ok=True)
+    chemin = os.path.join(export_dir, f"visites_{(jour or date.today()).isoformat()}.jsonl")
+    ligne = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+    with _verrou_jsonl:
+        fd = os.open(chemin, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, ligne)
+        finally:
+            os.close(fd)
+    return chemin
+
+
+# Générateur sur les enregistrements d'un ou plusieurs fichiers JSONL (lus ligne par ligne)
+def lire_jsonl(*chemins):
+    for chemin in chemins:
+        with open(chemin, encoding="utf-8") as f:
+            for ligne in f:
+                if ligne.strip():
+                    yield json.loads(ligne)
+
+
+def visites_stockees(depuis=None, jusqua=None):
+    for visite_id, data in parcourir_visites(depuis, jusqua):
+        yield enregistrement(data, visite_id)
+
+
+def schema_parquet():
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("schema_version", pa.int16()),
+            ("visite_id", pa.int64()),
+            ("num_patient", pa.string()),
+            ("date_visite", pa.date32()),
+        ]
+        + [(colonne, pa.int8()) for colonne in COLONNES_MESURES]
+        + [(cle, pa.int16() if cle == "Âge" else pa.string()) for cle in CLES_RAPPORT]
+        + [("autres", pa.string())],
+        metadata={"schema": SCHEMA, "schema_version": str(SCHEMA_VERSION)},
+    )
+
+
+def _texte(valeur):
+    if valeur is None or isinstance(valeur, str):
+        return valeur
+    if isinstance(valeur, (dict, list)):
+        return json.dumps(valeur, ensure_ascii=False)
+    return str(valeur)
+
+
+# Fonction pour aplatir un enregistrement en ligne Parquet : une colonne par clé du rapport, valeurs imbriquées en JSON
+def ligne_parquet(record):
+    donnees = record["donnees"]
+    ligne = {
+        "schema_version": record.get("schema_version", SCHEMA_VERSION),
+        "visite_id": record.get("visite_id"),
+        "num_patient": record.get("num_patient"),
+        "date_visite": date.fromisoformat(record["date_visite"]) if record.get("date_visite") else None,
+        **record.get("mesures", {}),
+    }
+    for cle in CLES_RAPPORT:
+        ligne[cle] = _texte(donnees.get(cle))
+    # Colonne entière : un âge modifié à la main dans un rapport importé ("45 ans") reste dans "autres"
+    age = donnees.get("Âge")
+    ligne["Âge"] = age if isinstance(age, int) and not isinstance(age, bool) and -2**15 <= age < 2**15 else None
+    autres = {cle: valeur for cle, valeur in donnees.items() if cle not in ligne or (cle == "Âge" and ligne[cle] is None)}
+    ligne["autres"] = json.dumps(autres, ensure_ascii=False) if autres else None
+    return ligne
+
+
+# Fonction pour écrire un fichier Parquet à partir d'un flux d'enregistrements, par groupes de TAILLE_LOT lignes
+# (mémoire bornée quel que soit le nombre de visites). Retourne le nombre de visites écrites.
+def ecrire_parquet(records, chemin, taille_lot=TAILLE_LOT):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = schema_parquet()
+    total = 0
+    with pq.ParquetWriter(chemin, schema, compression="zstd") as writer:
+        lot = []
+        for record in records:
+            lot.append(ligne_parquet(record))
+            if len(lot) >= taille_lot:
+                writer.write_table(pa.Table.from_pylist(lot, schema=schema))
+                total += len(lot)
+                lot = []
+        if lot:
+            writer.write_table(pa.Table.from_pylist(lot, schema=schema))
+            total += len(lot)
+    return total
+
+
+def ecrire_jsonl(records, chemin):
+    total = 0
+    with open(chemin, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            total += 1
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporte les visites en JSONL ou Parquet.")
+    parser.add_argument("sources", nargs="*", help="Fichiers JSONL à convertir (défaut : la base locale des visites)")
+    parser.add_argument("-o", "--sortie", required=True, help="Fichier .parquet ou .jsonl")
+    parser.add_argument("--depuis", help="Date de visite minimale (AAAA-MM-JJ), base locale uniquement")
+    parser.add_argument("--jusqua", help="Date de visite maximale (AAAA-MM-JJ), base locale uniquement")
+    args = parser.parse_args(argv)
+
+    debut = datetime.now()
+    records = lire_jsonl(*args.sources) if args.sources else visites_stockees(args.depuis, args.jusqua)
+    if args.sortie.endswith(".parquet"):
+        total = ecrire_parquet(records, args.sortie)
+    else:
+        total = ecrire_jsonl(records, args.sortie)
+    duree = (datetime.now() - debut).total_seconds()
+    print(f"{total} visites exportées dans {args.sortie} en {duree:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
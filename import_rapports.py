@@ -0,0 +1,177 @@
+import argparse
+import ast
+import fnmatch
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import stockage
+from visite import CLES_RAPPORT
+
+# Import en lot des anciens rapports texte (Rapport_*.txt, Rapport_Modifié_*.txt) dans la base locale des visites.
+# Tout est en flux : les fichiers sont découverts, lus ligne à ligne, analysés par lots dans un pool de processus
+# (nombre de lots en vol borné) et insérés par transactions de TAILLE_TRANSACTION ; la mémoire ne dépend pas
+# du nombre de fichiers. Un fichier déjà importé est ignoré, l'import peut donc être relancé.
+#
+#   python import_rapports.py ~/Rapports /mnt/archive --workers 4
+
+MOTIF_RAPPORTS = "Rapport_*.txt"
+PREFIXE_MODIFIE = "Rapport_Modifié_"
+FICHIERS_PAR_LOT = 64
+LOTS_EN_VOL = 4  # par processus
+TAILLE_TRANSACTION = 500
+
+_PREFIXES_CLES = {f"{cle}: ": cle for cle in CLES_RAPPORT}
+
+
+# Générateur sur les rapports d'un ou plusieurs dossiers (parcours récursif, sans liste complète en mémoire)
+def trouver_rapports(*dossiers):
+    for dossier in dossiers:
+        if os.path.isfile(dossier):
+            yield dossier
+            continue
+        pile = [dossier]
+        while pile:
+            with os.scandir(pile.pop()) as entrees:
+                for entree in entrees:
+                    if entree.is_dir(follow_symlinks=False):
+                        pile.append(entree.path)
+                    elif fnmatch.fnmatch(entree.name, MOTIF_RAPPORTS):
+                        yield entree.path
+
+
+# Fonction pour retrouver la valeur d'origine : dictionnaires (Q1–Q4, usures) écrits avec repr(), âge en nombre
+def _valeur(cle, texte):
+    texte = texte.rstrip("\n")
+    if texte[:1] in "{[":
+        try:
+            return ast.literal_eval(texte)
+        except (ValueError, SyntaxError):
+            return texte  # rapport modifié à la main : on garde le texte
+    if cle == "Âge" and texte.isdigit():
+        return int(texte)
+    return texte
+
+
+# Fonction pour analyser un rapport ligne à ligne. Une ligne qui ne commence pas par une clé connue
+# (espaces interdentaires "17-16: ...", texte sur plusieurs lignes) continue la valeur précédente.
+def parser_rapport(lignes):
+    data = {}
+    cle, morceaux = None, []
+    for ligne in lignes:
+        separateur = ligne.find(": ")
+        nouvelle_cle = _PREFIXES_CLES.get(ligne[:separateur + 2]) if separateur > 0 else None
+        if nouvelle_cle:
+            if cle:
+                data[cle] = _valeur(cle, "".join(morceaux))
+            cle, morceaux = nouvelle_cle, [ligne[separateur + 2:]]
+        elif cle:
+            morceaux.append(ligne)
+        # les lignes avant la première clé (en-tête "Rapport Patient") sont ignorées
+    if cle:
+        data[cle] = _valeur(cle, "".join(morceaux))
+    return data
+
+
+def parser_fichier(chemin):
+    with open(chemin, encoding="utf-8", errors="replace") as f:
+        data = parser_rapport(f)
+    return os.path.basename(chemin), data
+
+
+def parser_lot(chemins):
+    return [parser_fichier(chemin) for chemin in chemins]
+
+
+def _lots(elements, taille):
+    lot = []
+    for element in elements:
+        lot.append(element)
+        if len(lot) >= taille:
+            yield lot
+            lot = []
+    if lot:
+        yield lot
+
+
+# Générateur des rapports analysés, dans l'ordre, avec au plus workers × LOTS_EN_VOL lots en cours
+def rapports_analyses(chemins, workers=None):
+    workers = workers or os.cpu_count() or 1
+    lots = _lots(chemins, FICHIERS_PAR_LOT)
+    if workers == 1:
+        for lot in lots:
+            yield from parser_lot(lot)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        en_vol = deque()
+        for lot in lots:
+            en_vol.append(executor.submit(parser_lot, lot))
+            if len(en_vol) >= workers * LOTS_EN_VOL:
+                yield from en_vol.popleft().result()
+        while en_vol:
+            yield from en_vol.popleft().result()
+
+
+# Fonction pour charger les rapports dans la base. Une même visite (patient + date) n'est gardée qu'une fois :
+# un rapport modifié remplace l'original, un original n'écrase jamais une visite existante.
+def importer(chemins, workers=None, chemin_base=None):
+    with stockage.connexion(chemin_base) as con:
+        a_lire = (
+            chemin for chemin in chemins
+            if not con.execute("SELECT 1 FROM imports WHERE fichier = ?", (os.path.basename(chemin),)).fetchone()
+        )
+        compteurs = {"importés": 0, "remplacés": 0, "doublons": 0, "sans numéro": 0}
+
+        def enregistrer(lot):
+            with con:
+                for fichier, data in lot:
+                    visite_id = None
+                    num_patient = data.get("Numéro du Patient")
+                    if not num_patient:
+                        compteurs["sans numéro"] += 1
+                    else:
+                        existante = con.execute(
+                            "SELECT id FROM visites WHERE num_patient = ? AND date_visite IS ? ORDER BY id DESC LIMIT 1",
+                            (num_patient, stockage.date_iso(data.get("Date d'aujourd'hui"))),
+                        ).fetchone()
+                        if existante is None:
+                            visite_id = stockage.inserer_visite(con, data)
+                            compteurs["importés"] += 1
+                        elif fichier.startswith(PREFIXE_MODIFIE):
+                            visite_id = existante["id"]
+                            stockage.remplacer_visite(con, visite_id, data)
+                            compteurs["remplacés"] += 1
+                        else:
+                            compteurs["doublons"] += 1
+                    con.execute(
+                        "INSERT OR REPLACE INTO imports (fichier, visite_id, importe_le) VALUES (?, ?, ?)",
+                        (fichier, visite_id, datetime.now().isoformat(timespec="seconds")),
+                    )
+
+        for lot in _lots(rapports_analyses(a_lire, workers), TAILLE_TRANSACTION):
+            enregistrer(lot)
+        return compteurs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importe les rapports texte dans la base locale des visites.")
+    parser.add_argument("dossiers", nargs="+", help="Dossiers (parcourus récursivement) ou fichiers de rapports")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut : nombre de cœurs)")
+    args = parser.parse_args(argv)
+
+    debut = time.perf_counter()
+    compteurs = importer(trouver_rapports(*args.dossiers), workers=args.workers)
+    duree = time.perf_counter() - debut
+
+    total = sum(compteurs.values())
+    debit = total / duree if duree else 0
+    print(f"{total} rapports lus en {duree:.2f} s ({debit:.0f} rapports/s) : "
+          + ", ".join(f"{nombre} {libelle}" for libelle, nombre in compteurs.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+import uuid
+import weakref
+
+from config import chemin_donnees
+
+# Sauvegarde automatique du formulaire en cours (brouillon) pour survivre à un rechargement de l'onglet ou à un
+# redémarrage du serveur. Chaque brouillon est un journal JSONL en ajout seul : une ligne par lot de modifications,
+# avec seulement les clés changées ({"m": {clé: valeur}, "s": [clés supprimées]}). Les écritures sont regroupées :
+# rien n'est écrit tant que le formulaire change moins de DELAI_ECRITURE secondes après la modification précédente
+# (au plus DELAI_MAXIMUM secondes d'attente). Au-delà de COMPACTION_LIGNES lignes, le journal est réécrit en une seule
+# ligne (état complet), de sorte que la reprise ne relit jamais qu'un petit fichier.
+# L'identifiant du brouillon est dans l'URL (?brouillon=...) : un rechargement retrouve le même journal.
+# Le journal est vidé quand la visite est enregistrée (Journal.effacer) : il ne garde que le travail non enregistré.
+
+DOSSIER = "brouillons"
+DELAI_ECRITURE = 2.0
+DELAI_MAXIMUM = 10.0
+COMPACTION_LIGNES = 200
+CONSERVATION = 7 * 24 * 3600  # brouillons plus anciens supprimés (secondes)
+
+_IDENTIFIANT = re.compile(r"^[0-9a-f]{32}$")
+_ABSENT = object()
+_journaux = weakref.WeakValueDictionary()
+_verrou = threading.Lock()
+_nettoye = False
+
+
+def nouvel_identifiant():
+    return uuid.uuid4().hex
+
+
+def identifiant_valide(identifiant):
+    return isinstance(identifiant, str) and bool(_IDENTIFIANT.match(identifiant))
+
+
+def chemin_journal(identifiant):
+    return chemin_donnees(DOSSIER, f"{identifiant}.jsonl")
+
+
+# Fonction pour rejouer un journal : l'état complet du formulaire (vide si le brouillon n'existe pas)
+def charger(identifiant):
+    etat = {}
+    try:
+        with open(chemin_journal(identifiant), encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    entree = json.loads(ligne)
+                except ValueError:
+                    break  # dernière ligne tronquée par un arrêt brutal : on garde ce qui précède
+                etat.update(entree.get("m", {}))
+                for cle in entree.get("s", ()):
+                    etat.pop(cle, None)
+    except FileNotFoundError:
+        pass
+    return etat
+
+
+# Journal d'un brouillon, partagé par les sessions ouvertes sur la même URL
+class Journal:
+    def __init__(self, identifiant, etat=None):
+        self.identifiant = identifiant
+        self.chemin = chemin_journal(identifiant)
+        self.etat = dict(etat or {})  # état connu (écrit ou en attente)
+        self._modifiees = {}
+        self._supprimees = set()
+        self._premiere_attente = None
+        self._minuterie = None
+        self._lignes = 1 if self.etat else 0
+        self.enregistre = False  # état courant enregistré dans la base : plus rien à reprendre
+        self._verrou = threading.Lock()
+
+    # Fonction à appeler à chaque exécution du formulaire avec son état complet : seules les différences sont gardées
+    def noter(self, etat):
+        with self._verrou:
+            for cle, valeur in etat.items():
+                if self.etat.get(cle, _ABSENT) != valeur:
+                    self.etat[cle] = valeur
+                    self._modifiees[cle] = valeur
+                    self._supprimees.discard(cle)
+            for cle in [cle for cle in self.etat if cle not in etat]:
+                del self.etat[cle]
+                self._modifiees.pop(cle, None)
+                self._supprimees.add(cle)
+            if not self._modifiees and not self._supprimees:
+                return
+            self.enregistre = False
+            maintenant = time.monotonic()
+            if self._premiere_attente is None:
+                self._premiere_attente = maintenant
+            if self._minuterie is not None:
+                self._minuterie.cancel()
+            delai = min(DELAI_ECRITURE, max(0.0, self._premiere_attente + DELAI_MAXIMUM - maintenant))
+            self._minuterie = threading.Timer(delai, self.vider)
+            self._minuterie.daemon = True
+            self._minuterie.start()
+
+    # Fonction pour écrire les modifications en attente (une ligne), puis compacter le journal si besoin
+    def vider(self):
+        with self._verrou:
+            if self._minuterie is not None:
+                self._minuterie.cancel()
+                self._minuterie = None
+            self._premiere_attente = None
+            if not self._modifiees and not self._supprimees:
+                return
+            entree = {"t": round(time.time(), 3), "m": self._modifiees}
+            if self._supprimees:
+                entree["s"] = sorted(self._supprimees)
+            self._modifiees, self._supprimees = {}, set()
+            # Journal vide (nouveau ou effacé après un enregistrement) : la première ligne porte l'état complet
+            if self._lignes == 0 or self._lignes >= COMPACTION_LIGNES:
+                self._compacter()
+                return
+            with open(self.chemin, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entree, ensure_ascii=False) + "\n")
+            self._lignes += 1
+
+    # Fonction à appeler quand le formulaire est enregistré (état complet donné) : le journal est vidé, et seules les
+    # modifications suivantes en feront de nouveau un brouillon à reprendre
+    def effacer(self, etat):
+        with self._verrou:
+            if self._minuterie is not None:
+                self._minuterie.cancel()
+                self._minuterie = None
+            self._premiere_attente = None
+            self.etat = dict(etat)
+            self._modifiees, self._supprimees = {}, set()
+            self._lignes = 0
+            self.enregistre = True
+            try:
+                os.remove(self.chemin)
+            except FileNotFoundError:
+                pass
+
+    # Réécrit le journal en une seule ligne (état complet) ; le remplacement est atomique
+    def _compacter(self):
+        temporaire = f"{self.chemin}.tmp"
+        with open(temporaire, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"t": round(time.time(), 3), "m": self.etat}, ensure_ascii=False) + "\n")
+        os.replace(temporaire, self.chemin)
+        self._lignes = 1
+
+
+# Supprime les brouillons abandonnés depuis plus de CONSERVATION secondes (une fois par processus)
+def _nettoyer():
+    global _nettoye
+    if _nettoye:
+        return
+    _nettoye = True
+    limite = time.time() - CONSERVATION
+    with os.scandir(chemin_donnees(DOSSIER, "")) as entrees:
+        for entree in entrees:
+            if entree.name.endswith(".jsonl") and entree.stat().st_mtime < limite:
+                os.remove(entree.path)
+
+
+# Fonction pour ouvrir le journal d'un brouillon ; renvoie (journal, état rejoué) — état vide pour un nouveau brouillon
+def ouvrir(identifiant):
+    with _verrou:
+        _nettoyer()
+        journal = _journaux.get(identifiant)
+        if journal is None:
+            journal = Journal(identifiant, charger(identifiant))
+            if journal.etat:
+                # Repart d'une ligne propre : une fin tronquée (arrêt brutal) ne gâche pas les ajouts suivants
+                journal._compacter()
+            _journaux[identifiant] = journal
+    return journal, {} if journal.enregistre else dict(journal.etat)
+
+
+# Arrêt normal du serveur : les modifications en attente sont écrites
+@atexit.register
+def _vider_tout():
+    for journal in list(_journaux.values()):
+        journal.vider()
@@ -0,0 +1,265 @@
+from reportlab.lib import colors
+from reportlab.pdfgen.pathobject import PDFPathObject
+from reportlab.platypus import Flowable
+
+from dents import CONDITIONS_ETAT, CONDITIONS_SURFACES, DENTS, QUADRANTS, RISQUE, Constats
+from visite import DPSI_CODES, mesures_visite
+
+# Odontogramme des 32 dents (constats Q1–Q4 par surface M/D/V/O/P-L, DPSI par sextant) pour le rapport PDF.
+# Le schéma de base (contours des dents, numéros, sextants, légende) est un Form XObject défini une seule fois par
+# document et réutilisé (doForm) ; sa géométrie est calculée une seule fois à l'import. Pour chaque patient, seuls
+# les constats sont dessinés par-dessus.
+
+NOM_GABARIT = "OdontogrammeBase"
+
+# Géométrie du schéma (points), mise à l'échelle de la largeur disponible au dessin
+TAILLE = 22  # côté d'une dent
+ECART = 5
+MILIEU = 10  # espace entre les deux hémi-arcades
+INTERIEUR = 0.32  # part du côté occupée par chaque bord (le centre est la face occlusale)
+MARGE_X = 6
+BANDE_DPSI = 16
+BANDE_NUMERO = 10
+ENTRE_ARCADES = 14
+HAUTEUR_LEGENDE = 18
+LARGEUR = 2 * MARGE_X + 16 * TAILLE + 15 * ECART + MILIEU
+HAUTEUR = 2 * (BANDE_DPSI + BANDE_NUMERO + TAILLE) + ENTRE_ARCADES + HAUTEUR_LEGENDE
+
+# Rangées du schéma, de la droite du patient (à gauche) vers sa gauche
+RANGEE_HAUT = list(QUADRANTS["Q1"]) + list(reversed(QUADRANTS["Q2"]))
+RANGEE_BAS = list(QUADRANTS["Q4"]) + list(reversed(QUADRANTS["Q3"]))
+# Sextants DPSI : (colonne de début, colonne de fin) dans la rangée ; 1-2-3 en haut, 6-5-4 en bas
+SEXTANTS = {0: (True, 0, 4), 1: (True, 5, 10), 2: (True, 11, 15), 5: (False, 0, 4), 4: (False, 5, 10), 3: (False, 11, 15)}
+
+# Couleurs des constats par surface, dessinés du moins au plus important (une carie recouvre un composite)
+COULEURS_SURFACES = {
+    "Composite": colors.HexColor("#5b9bd5"),
+    "Amalgamme": colors.HexColor("#595959"),
+    "Déminéralisation": colors.HexColor("#f4b183"),
+    "Suspicion de carie": colors.HexColor("#c00000"),
+}
+ORDRE_SURFACES = [condition for condition in COULEURS_SURFACES if condition in CONDITIONS_SURFACES]
+COULEUR_OK = colors.HexColor("#2e7d32")
+COULEUR_RISQUE = colors.HexColor("#c00000")
+COULEURS_DPSI = [colors.HexColor(c) for c in ("#c6efce", "#ffeb9c", "#ffc7ce", "#ff9c9c", "#c00000")]
+COULEUR_TRAIT = colors.HexColor("#404040")
+
+
+def _x_colonne(colonne):
+    return MARGE_X + colonne * (TAILLE + ECART) + (MILIEU if colonne >= 8 else 0)
+
+
+# Polygones des faces d'une dent dont le coin bas-gauche est (x, y) : bords haut, bas, gauche, droit et centre
+def _faces(x, y):
+    bord = TAILLE * INTERIEUR
+    xi, yi, xs, ys = x + bord, y + bord, x + TAILLE - bord, y + TAILLE - bord
+    xe, ye = x + TAILLE, y + TAILLE
+    return {
+        "haut": [(x, ye), (xe, ye), (xs, ys), (xi, ys)],
+        "bas": [(x, y), (xe, y), (xs, yi), (xi, yi)],
+        "gauche": [(x, y), (x, ye), (xi, ys), (xi, yi)],
+        "droite": [(xe, y), (xe, ye), (xs, ys), (xs, yi)],
+        "centre": [(xi, yi), (xs, yi), (xs, ys), (xi, ys)],
+    }
+
+
+# Géométrie de chaque dent, calculée une fois : position et polygones par surface (M/D/V/O/P/L)
+def _geometrie():
+    y_bas = HAUTEUR_LEGENDE + BANDE_DPSI + BANDE_NUMERO
+    y_haut = y_bas + TAILLE + ENTRE_ARCADES
+    geometrie = {}
+    for haut, rangee, y in ((True, RANGEE_HAUT, y_haut), (False, RANGEE_BAS, y_bas)):
+        for colonne, dent in enumerate(rangee):
+            x = _x_colonne(colonne)
+            faces = _faces(x, y)
+            # Faces vestibulaires vers l'extérieur du schéma ; mésiales vers la ligne médiane
+            mesial, distal = ("droite", "gauche") if colonne < 8 else ("gauche", "droite")
+            vestibulaire, interne = ("haut", "bas") if haut else ("bas", "haut")
+            surfaces = {
+                "M": faces[mesial], "D": faces[distal], "V": faces[vestibulaire], "O": faces["centre"],
+                "P": faces[interne], "L": faces[interne],
+            }
+            geometrie[dent] = {"x": x, "y": y, "haut": haut, "surfaces": surfaces}
+    return geometrie
+
+
+# Contours de toutes les dents en un seul chemin : les coordonnées sont mises en forme une fois pour toutes
+def _contours(geometrie):
+    chemin = PDFPathObject()
+    bord = TAILLE * INTERIEUR
+    for geo in geometrie.values():
+        x, y = geo["x"], geo["y"]
+        chemin.rect(x, y, TAILLE, TAILLE)
+        chemin.rect(x + bord, y + bord, TAILLE - 2 * bord, TAILLE - 2 * bord)
+        for (x1, y1), (x2, y2) in (
+            ((x, y), (x + bord, y + bord)), ((x + TAILLE, y), (x + TAILLE - bord, y + bord)),
+            ((x, y + TAILLE), (x + bord, y + TAILLE - bord)), ((x + TAILLE, y + TAILLE), (x + TAILLE - bord, y + TAILLE - bord)),
+        ):
+            chemin.moveTo(x1, y1)
+            chemin.lineTo(x2, y2)
+    return chemin
+
+
+GEOMETRIE = _geometrie()
+CONTOURS = _contours(GEOMETRIE)
+
+
+def _polygone(canv, points, trait=1, fond=0):
+    chemin = canv.beginPath()
+    chemin.moveTo(*points[0])
+    for point in points[1:]:
+        chemin.lineTo(*point)
+    chemin.close()
+    canv.drawPath(chemin, stroke=trait, fill=fond)
+
+
+def _bande_sextant(haut, debut, fin):
+    y = HAUTEUR - BANDE_DPSI if haut else HAUTEUR_LEGENDE
+    return _x_colonne(debut), y + 2, _x_colonne(fin) + TAILLE - _x_colonne(debut), BANDE_DPSI - 4
+
+
+# Schéma de base, dessiné dans le Form XObject
+def _dessiner_base(canv):
+    canv.setStrokeColor(COULEUR_TRAIT)
+    canv.setLineWidth(0.5)
+    canv.setFont("Helvetica", 6.5)
+    canv.setFillColor(COULEUR_TRAIT)
+    canv.drawPath(CONTOURS, stroke=1, fill=0)
+    for dent, geo in GEOMETRIE.items():
+        y_numero = geo["y"] + TAILLE + 3 if geo["haut"] else geo["y"] - BANDE_NUMERO + 3
+        canv.drawCentredString(geo["x"] + TAILLE / 2, y_numero, dent)
+    # Ligne médiane
+    x_milieu = _x_colonne(8) - (ECART + MILIEU) / 2
+    canv.setDash(2, 2)
+    canv.line(x_milieu, HAUTEUR_LEGENDE, x_milieu, HAUTEUR)
+    canv.setDash()
+    # Cadres des sextants DPSI
+    canv.setFont("Helvetica", 6)
+    for sextant, (haut, debut, fin) in SEXTANTS.items():
+        x, y, largeur, hauteur = _bande_sextant(haut, debut, fin)
+        canv.roundRect(x, y, largeur, hauteur, 2, stroke=1, fill=0)
+        canv.drawString(x + 3, y + 3.5, f"S{sextant + 1}")
+    # Légende
+    x = MARGE_X
+    y = 4
+    for condition in ORDRE_SURFACES:
+        canv.setFillColor(COULEURS_SURFACES[condition])
+        canv.rect(x, y, 7, 7, stroke=0, fill=1)
+        canv.setFillColor(COULEUR_TRAIT)
+        canv.drawString(x + 9, y + 1, condition)
+        x += 14 + canv.stringWidth(condition, "Helvetica", 6)
+    for symbole, libelle in (("X", "Manquante"), ("O", "Couronne"), ("I", "Implant"), ("=", "Bridge")):
+        canv.drawString(x, y + 1, f"{symbole} {libelle}")
+        x += 10 + canv.stringWidth(f"{symbole} {libelle}", "Helvetica", 6)
+    canv.drawString(x, y + 1, "vert : OK, rouge : risque")
+
+
+# Constats d'un patient, par-dessus le schéma de base
+def _dessiner_constats(canv, constats, dpsi):
+    surfaces_marquees = {}
+    for dent, surface, condition, valeur in constats:
+        surfaces_marquees.setdefault((dent, condition), set()).add(surface)
+
+    canv.setLineWidth(0.5)
+    canv.setStrokeColor(COULEUR_TRAIT)
+    for condition in ORDRE_SURFACES:
+        canv.setFillColor(COULEURS_SURFACES[condition])
+        for dent in DENTS:
+            surfaces = surfaces_marquees.get((dent, condition))
+            if not surfaces:
+                continue
+            geo = GEOMETRIE[dent]
+            faces = [surface for surface in surfaces if surface in geo["surfaces"]]
+            for surface in faces:
+                _polygone(canv, geo["surfaces"][surface], fond=1)
+            if "Collet" in surfaces:
+                # Collet : trait épais sur le bord vestibulaire
+                y = geo["y"] + TAILLE if geo["haut"] else geo["y"]
+                canv.setStrokeColor(COULEURS_SURFACES[condition])
+                canv.setLineWidth(2.5)
+                canv.line(geo["x"], y, geo["x"] + TAILLE, y)
+                canv.setLineWidth(0.5)
+                canv.setStrokeColor(COULEUR_TRAIT)
+            if not faces and "Collet" not in surfaces:
+                # Constat sans surface précisée : contour de la dent
+                canv.setStrokeColor(COULEURS_SURFACES[condition])
+                canv.setLineWidth(1.5)
+                canv.rect(geo["x"], geo["y"], TAILLE, TAILLE, stroke=1, fill=0)
+                canv.setLineWidth(0.5)
+                canv.setStrokeColor(COULEUR_TRAIT)
+
+    for dent in DENTS:
+        geo = GEOMETRIE[dent]
+        x, y = geo["x"], geo["y"]
+        if constats.valeur(dent, "Dent manquante"):
+            canv.setStrokeColor(colors.black)
+            canv.setLineWidth(1.5)
+            canv.line(x - 2, y - 2, x + TAILLE + 2, y + TAILLE + 2)
+            canv.line(x - 2, y + TAILLE + 2, x + TAILLE + 2, y - 2)
+        for condition in CONDITIONS_ETAT:
+            etat = constats.valeur(dent, condition)
+            if not etat:
+                continue
+            canv.setStrokeColor(COULEUR_RISQUE if etat == RISQUE else COULEUR_OK)
+            canv.setLineWidth(1.2)
+            # Côté des racines : vers le centre du schéma
+            y_racine = y if geo["haut"] else y + TAILLE
+            sens = -1 if geo["haut"] else 1
+            if condition == "Couronne sur dent":
+                canv.circle(x + TAILLE / 2, y + TAILLE / 2, TAILLE * 0.62, stroke=1, fill=0)
+            elif condition == "Implant":
+                x_racine = x + TAILLE / 2
+                canv.line(x_racine, y_racine, x_racine, y_racine + sens * (ENTRE_ARCADES / 2 - 1))
+                for i in range(1, 4):
+                    y_pas = y_racine + sens * i * 1.6
+                    canv.line(x_racine - 2, y_pas, x_racine + 2, y_pas)
+            elif condition == "Bridge":
+                # Barre jusqu'aux dents voisines : les éléments d'un même bridge se rejoignent
+                canv.setLineWidth(2)
+                y_barre = y_racine + sens * 2.5
+                canv.line(x - ECART / 2, y_barre, x + TAILLE + ECART / 2, y_barre)
+
+    canv.setFont("Helvetica-Bold", 7)
+    for sextant, rang in enumerate(dpsi):
+        if not rang:
+            continue
+        haut, debut, fin = SEXTANTS[sextant]
+        x, y, largeur, hauteur = _bande_sextant(haut, debut, fin)
+        canv.setFillColor(COULEURS_DPSI[rang - 1])
+        canv.roundRect(x + largeur - 22, y + 1, 20, hauteur - 2, 2, stroke=0, fill=1)
+        canv.setFillColor(colors.white if rang == len(DPSI_CODES) else colors.black)
+        canv.drawCentredString(x + largeur - 12, y + 3.5, DPSI_CODES[rang - 1])
+
+
+# Flowable de l'odontogramme, mis à l'échelle de la largeur du cadre
+class Odontogramme(Flowable):
+    def __init__(self, constats, dpsi):
+        super().__init__()
+        self.constats = constats
+        self.dpsi = dpsi
+        self.echelle = 1
+
+    def wrap(self, largeur_dispo, hauteur_dispo):
+        self.echelle = min(1.5, largeur_dispo / LARGEUR)
+        return LARGEUR * self.echelle, HAUTEUR * self.echelle
+
+    def draw(self):
+        canv = self.canv
+        if not canv.hasForm(NOM_GABARIT):
+            canv.beginForm(NOM_GABARIT, lowerx=0, lowery=0, upperx=LARGEUR, uppery=HAUTEUR)
+            _dessiner_base(canv)
+            canv.endForm()
+        canv.saveState()
+        canv.scale(self.echelle, self.echelle)
+        canv.doForm(NOM_GABARIT)
+        _dessiner_constats(canv, self.constats, self.dpsi)
+        canv.restoreState()
+
+
+# Fonction pour construire l'odontogramme d'un rapport (dictionnaire prepare_data) ; None s'il n'y a rien à montrer
+def odontogramme_rapport(data):
+    constats = Constats.depuis_rapport(data)
+    dpsi = mesures_visite(data)[:len(SEXTANTS)]
+    if not any(constats.grille) and not any(dpsi):
+        return None
+    return Odontogramme(constats, dpsi)
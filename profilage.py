@@ -0,0 +1,157 @@
+import bisect
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import PROFILAGE
+
+# Mesure optionnelle des temps de l'app (ANM_PROFILAGE=1) : blocs des onglets, appels externes (CBIP) et générateurs
+# de documents. Les mesures sont communes à tout le serveur ; elles s'affichent dans un panneau de la barre latérale
+# (histogramme glissant) et s'exportent au format texte Prometheus ou en trace JSONL.
+# Sans ANM_PROFILAGE, les décorateurs renvoient la fonction telle quelle et mesure() ne fait rien.
+
+ACTIF = PROFILAGE
+
+# Bornes des seaux de l'histogramme (secondes), comme les histogrammes Prometheus
+BORNES = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+TAILLE_FENETRE = 200  # dernières mesures gardées par bloc (histogramme glissant)
+TAILLE_TRACE = 5000  # derniers événements gardés pour la trace JSONL
+
+_verrou = threading.Lock()
+_fenetres = {}
+_cumuls = {}  # bloc -> [compteurs par seau (+Inf en dernier), somme, nombre], depuis le démarrage
+_trace = deque(maxlen=TAILLE_TRACE)
+
+horloge = time.perf_counter
+
+
+def enregistrer(bloc, duree):
+    if not ACTIF:
+        return
+    with _verrou:
+        fenetre = _fenetres.get(bloc)
+        if fenetre is None:
+            fenetre = _fenetres[bloc] = deque(maxlen=TAILLE_FENETRE)
+            _cumuls[bloc] = [[0] * (len(BORNES) + 1), 0.0, 0]
+        fenetre.append(duree)
+        cumul = _cumuls[bloc]
+        cumul[0][bisect.bisect_left(BORNES, duree)] += 1
+        cumul[1] += duree
+        cumul[2] += 1
+        _trace.append((time.time(), bloc, duree, threading.current_thread().name))
+
+
+# Contexte pour mesurer un bloc de code : with profilage.mesure("enregistrer_visite"): ...
+@contextmanager
+def mesure(bloc):
+    if not ACTIF:
+        yield
+        return
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        enregistrer(bloc, time.perf_counter() - debut)
+
+
+# Décorateur pour mesurer chaque appel d'une fonction (fragments des onglets, générateurs)
+def chronometre(bloc):
+    def decorateur(fonction):
+        if not ACTIF:
+            return fonction
+
+        @functools.wraps(fonction)
+        def mesuree(*args, **kwargs):
+            debut = time.perf_counter()
+            try:
+                return fonction(*args, **kwargs)
+            finally:
+                enregistrer(bloc, time.perf_counter() - debut)
+        return mesuree
+    return decorateur
+
+
+def _quantile(valeurs_triees, q):
+    return valeurs_triees[min(len(valeurs_triees) - 1, int(q * len(valeurs_triees)))]
+
+
+# Fonction pour résumer la fenêtre glissante de chaque bloc (millisecondes)
+def resume():
+    with _verrou:
+        fenetres = {bloc: sorted(fenetre) for bloc, fenetre in _fenetres.items()}
+    return [
+        {
+            "bloc": bloc,
+            "mesures": len(valeurs),
+            "p50_ms": round(_quantile(valeurs, 0.5) * 1000, 2),
+            "p95_ms": round(_quantile(valeurs, 0.95) * 1000, 2),
+            "max_ms": round(valeurs[-1] * 1000, 2),
+            "total_ms": round(sum(valeurs) * 1000, 1),
+        }
+        for bloc, valeurs in sorted(fenetres.items())
+    ]
+
+
+def _libelle_borne(borne):
+    return f"≤ {borne * 1000:g} ms"
+
+
+# Fonction pour l'histogramme glissant d'un bloc : {libellé du seau: nombre de mesures}
+def histogramme(bloc):
+    with _verrou:
+        valeurs = list(_fenetres.get(bloc, ()))
+    compteurs = [0] * (len(BORNES) + 1)
+    for valeur in valeurs:
+        compteurs[bisect.bisect_left(BORNES, valeur)] += 1
+    libelles = [_libelle_borne(borne) for borne in BORNES] + [f"> {BORNES[-1] * 1000:g} ms"]
+    return dict(zip(libelles, compteurs))
+
+
+def _echapper(texte):
+    return texte.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Fonction pour exporter les histogrammes cumulés au format texte Prometheus
+def prometheus():
+    lignes = [
+        "# HELP anm_easy_duree_secondes Durée des blocs instrumentés de l'app.",
+        "# TYPE anm_easy_duree_secondes histogram",
+    ]
+    with _verrou:
+        cumuls = {bloc: (list(compteurs), somme, nombre) for bloc, (compteurs, somme, nombre) in _cumuls.items()}
+    for bloc, (compteurs, somme, nombre) in sorted(cumuls.items()):
+        etiquette = f'bloc="{_echapper(bloc)}"'
+        total = 0
+        for borne, compteur in zip(BORNES, compteurs):
+            total += compteur
+            lignes.append(f'anm_easy_duree_secondes_bucket{{{etiquette},le="{borne:g}"}} {total}')
+        lignes.append(f'anm_easy_duree_secondes_bucket{{{etiquette},le="+Inf"}} {nombre}')
+        lignes.append(f"anm_easy_duree_secondes_sum{{{etiquette}}} {somme:.6f}")
+        lignes.append(f"anm_easy_duree_secondes_count{{{etiquette}}} {nombre}")
+    return "\n".join(lignes) + "\n"
+
+
+# Fonction pour exporter les derniers événements en trace JSONL (un objet par mesure)
+def trace_jsonl():
+    with _verrou:
+        evenements = list(_trace)
+    return "".join(
+        json.dumps({
+            "horodatage": datetime.fromtimestamp(horodatage).isoformat(timespec="milliseconds"),
+            "bloc": bloc,
+            "duree_ms": round(duree * 1000, 3),
+            "thread": thread,
+        }, ensure_ascii=False) + "\n"
+        for horodatage, bloc, duree, thread in evenements
+    )
+
+
+def reinitialiser():
+    with _verrou:
+        _fenetres.clear()
+        _cumuls.clear()
+        _trace.clear()
@@ -0,0 +1,72 @@
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A5
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
+
+# Rappels de rendez-vous d'une journée : un seul document (une page A5 par patient) construit en une passe,
+# à partir des données de rendezvous.rappels()
+
+MARGE = 14 * mm
+TEXTE_PIED = "Les cabinets dentaires Bettens"
+
+# Styles précalculés une seule fois et partagés par tous les rappels
+STYLE_TITRE = ParagraphStyle(name="RappelTitre", fontName="Helvetica-Bold", fontSize=14, leading=18, spaceAfter=10,
+                             textColor=colors.HexColor("#1f4e79"))
+STYLE_TEXTE = ParagraphStyle(name="RappelTexte", fontName="Helvetica", fontSize=10, leading=14, spaceAfter=8)
+STYLE_RDV = ParagraphStyle(name="RappelRdv", fontName="Helvetica-Bold", fontSize=12, leading=16, spaceBefore=4,
+                           spaceAfter=12)
+
+
+# Fonction pour les paragraphes du rappel d'un patient
+def _rappel(rdv):
+    nom = escape(rdv.get("Nom et Prénom") or "")
+    praticien = escape(rdv.get("Praticien") or "")
+    return [
+        Paragraph("Rappel de rendez-vous", STYLE_TITRE),
+        Paragraph(f"Bonjour {nom}," if nom else "Bonjour,", STYLE_TEXTE),
+        Paragraph("Nous vous rappelons votre prochain rendez-vous :", STYLE_TEXTE),
+        Paragraph(
+            f"le {escape(rdv.get('Date', ''))} à {escape(rdv.get('Heure', ''))}" + (f" avec {praticien}" if praticien else ""),
+            STYLE_RDV,
+        ),
+        Paragraph("En cas d'empêchement, merci de nous prévenir au moins 24 heures à l'avance.", STYLE_TEXTE),
+        Spacer(1, 6),
+        Paragraph("L'équipe des cabinets dentaires Bettens", STYLE_TEXTE),
+    ]
+
+
+# Fonction pour construire les flowables de tous les rappels (un saut de page entre deux patients)
+def build_rappels_flowables(rendez_vous):
+    story = []
+    for rdv in rendez_vous:
+        if story:
+            story.append(PageBreak())
+        story.extend(_rappel(rdv))
+    if not story:
+        story.append(Paragraph("Aucun rendez-vous ce jour.", STYLE_TEXTE))
+    return story
+
+
+def _pied_de_page(c, doc):
+    c.saveState()
+    c.setFont("Helvetica", 7)
+    c.setFillColor(colors.grey)
+    c.drawString(MARGE, 8 * mm, TEXTE_PIED)
+    c.drawRightString(doc.pagesize[0] - MARGE, 8 * mm, f"{doc.page}")
+    c.restoreState()
+
+
+# Fonction pour générer les rappels du jour (sans filename : rendu en mémoire, retourne les octets du PDF)
+def generate_rappels_pdf(rendez_vous, filename=None):
+    sortie = filename if filename is not None else BytesIO()
+    doc = SimpleDocTemplate(
+        sortie, pagesize=A5, leftMargin=MARGE, rightMargin=MARGE, topMargin=MARGE, bottomMargin=MARGE,
+        title="Rappels de rendez-vous", author=TEXTE_PIED,
+    )
+    doc.build(build_rappels_flowables(rendez_vous), onFirstPage=_pied_de_page, onLaterPages=_pied_de_page)
+    if filename is None:
+        return sortie.getvalue()
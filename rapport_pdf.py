@@ -0,0 +1,124 @@
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import KeepTogether, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from odontogramme import odontogramme_rapport
+from visite import SECTIONS
+
+CLES_CONNUES = {cle for _, cles in SECTIONS for cle in cles}
+
+MARGE = 18 * mm
+LARGEUR_LIBELLE = 48 * mm
+
+# Styles précalculés une seule fois et partagés par tous les rapports (jamais modifiés ensuite)
+STYLE_TITRE = ParagraphStyle(name="RapportTitre", fontName="Helvetica-Bold", fontSize=15, leading=18, spaceAfter=6)
+STYLE_SOUS_TITRE = ParagraphStyle(name="RapportSousTitre", fontName="Helvetica", fontSize=9, leading=11,
+                                  textColor=colors.grey, spaceAfter=8)
+STYLE_SECTION = ParagraphStyle(name="RapportSection", fontName="Helvetica-Bold", fontSize=11, leading=14,
+                               textColor=colors.HexColor("#1f4e79"), spaceBefore=8, spaceAfter=4)
+STYLE_LIBELLE = ParagraphStyle(name="RapportLibelle", fontName="Helvetica-Bold", fontSize=9, leading=11)
+STYLE_VALEUR = ParagraphStyle(name="RapportValeur", fontName="Helvetica", fontSize=9, leading=11)
+STYLE_TABLE = TableStyle([
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ("LINEBELOW", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+    ("TOPPADDING", (0, 0), (-1, -1), 2),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+    ("LEFTPADDING", (0, 0), (-1, -1), 2),
+])
+
+
+# Fonction pour formater une dent d'un quadrant : surfaces, précisions et états
+def _formater_dent(dent, details):
+    if not isinstance(details, dict):
+        return f"{escape(str(dent))}: {escape(str(details))}"
+    parties = []
+    for cle, valeur in details.items():
+        if valeur == "Non":
+            parties.append(escape(str(cle)))
+        else:
+            parties.append(f"{escape(str(cle))}: {escape(str(valeur))}")
+    return f"{escape(str(dent))} ({', '.join(parties)})" if parties else escape(str(dent))
+
+
+# Fonction pour convertir une valeur de prepare_data (texte, liste, dictionnaire imbriqué) en balisage
+def formater_valeur(valeur):
+    if isinstance(valeur, dict):
+        lignes = []
+        for cle, sous_valeur in valeur.items():
+            if isinstance(sous_valeur, dict):
+                dents = "; ".join(_formater_dent(dent, details) for dent, details in sous_valeur.items())
+                lignes.append(f"<b>{escape(str(cle))}</b>: {dents or '-'}")
+            elif isinstance(sous_valeur, (list, tuple)):
+                lignes.append(f"<b>{escape(str(cle))}</b>: {escape(', '.join(map(str, sous_valeur))) or '-'}")
+            else:
+                lignes.append(f"<b>{escape(str(cle))}</b>: {escape(str(sous_valeur))}")
+        return "<br/>".join(lignes)
+    if isinstance(valeur, (list, tuple)):
+        return escape(", ".join(map(str, valeur)))
+    return escape(str(valeur)).replace("\n", "<br/>")
+
+
+def _tableau_section(lignes, largeur):
+    table = Table(
+        [[Paragraph(escape(cle), STYLE_LIBELLE), Paragraph(formater_valeur(valeur), STYLE_VALEUR)]
+         for cle, valeur in lignes],
+        colWidths=[LARGEUR_LIBELLE, largeur - LARGEUR_LIBELLE],
+    )
+    table.setStyle(STYLE_TABLE)
+    return table
+
+
+# Fonction pour construire les flowables du rapport complet à partir du dictionnaire prepare_data()
+def build_report_flowables(data, largeur):
+    titre = "Rapport Patient"
+    if data.get("Nom et Prénom"):
+        titre += f" - {data['Nom et Prénom']}"
+    story = [
+        Paragraph(escape(titre), STYLE_TITRE),
+        Paragraph("Les cabinets dentaires Bettens", STYLE_SOUS_TITRE),
+    ]
+
+    sections = list(SECTIONS)
+    autres = [cle for cle in data if cle not in CLES_CONNUES]
+    if autres:
+        sections.append(("Autres", autres))
+
+    for titre_section, cles in sections:
+        lignes = [(cle, data[cle]) for cle in cles if data.get(cle) not in (None, "", {}, [])]
+        if titre_section == "Quadrants":
+            schema = odontogramme_rapport(data)
+            if schema is not None:
+                story.append(KeepTogether([Paragraph("Odontogramme", STYLE_SECTION), schema]))
+        if not lignes:
+            continue
+        story.append(KeepTogether([Paragraph(titre_section, STYLE_SECTION), _tableau_section(lignes[:1], largeur)]))
+        if len(lignes) > 1:
+            story.append(_tableau_section(lignes[1:], largeur))
+    story.append(Spacer(1, 6))
+    return story
+
+
+def _pied_de_page(c, doc):
+    c.saveState()
+    c.setFont("Helvetica", 8)
+    c.setFillColor(colors.grey)
+    c.drawString(MARGE, 10 * mm, "Les cabinets dentaires Bettens")
+    c.drawRightString(doc.pagesize[0] - MARGE, 10 * mm, f"Page {doc.page}")
+    c.restoreState()
+
+
+# Fonction pour générer le rapport PDF complet (sans filename : rendu en mémoire, retourne les octets du PDF)
+def generate_pdf(data, filename=None):
+    sortie = filename if filename is not None else BytesIO()
+    doc = SimpleDocTemplate(
+        sortie, pagesize=letter, leftMargin=MARGE, rightMargin=MARGE, topMargin=MARGE, bottomMargin=18 * mm,
+        title="Rapport Patient", author="Les cabinets dentaires Bettens",
+    )
+    doc.build(build_report_flowables(data, doc.width), onFirstPage=_pied_de_page, onLaterPages=_pied_de_page)
+    if filename is None:
+        return sortie.getvalue()
@@ -0,0 +1,98 @@
+import argparse
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import stockage
+
+# Agenda des prochains rendez-vous : la table rendez_vous de la base locale (un rendez-vous par patient, tiré de sa
+# visite la plus récente) est indexée sur l'heure de début et sur (praticien, début). Chaque requête est une recherche
+# par plage dans l'index (O(log n) + nombre de rendez-vous renvoyés), sans relire les visites.
+#
+#   python rendezvous.py --jour 20.10.2026 -o rappels.pdf
+#   python rendezvous.py --semaine
+
+DUREE_RDV = timedelta(minutes=30)  # durée supposée d'un rendez-vous pour détecter les chevauchements
+
+COLONNES = "num_patient, nom_prenom, praticien, debut, visite_id"
+
+
+def _rendez_vous(row):
+    rdv = dict(row)
+    rdv["debut"] = datetime.fromisoformat(rdv["debut"])
+    return rdv
+
+
+# Fonction pour lister les rendez-vous dont le début est dans [debut, fin[, par heure (éventuellement d'un praticien)
+def entre(debut, fin, praticien=None, chemin=None):
+    requete = f"SELECT {COLONNES} FROM rendez_vous WHERE debut >= ? AND debut < ?"
+    parametres = [debut.isoformat(timespec="minutes"), fin.isoformat(timespec="minutes")]
+    if praticien:
+        requete = f"SELECT {COLONNES} FROM rendez_vous WHERE praticien = ? AND debut >= ? AND debut < ?"
+        parametres.insert(0, praticien)
+    with stockage.connexion(chemin) as con:
+        rows = con.execute(requete + " ORDER BY debut, num_patient", parametres).fetchall()
+    return [_rendez_vous(row) for row in rows]
+
+
+# Fonction pour l'agenda d'une journée
+def agenda(jour, praticien=None, chemin=None):
+    debut = datetime.combine(jour, datetime.min.time())
+    return entre(debut, debut + timedelta(days=1), praticien, chemin)
+
+
+# Fonction pour les patients attendus dans la semaine (du lundi au dimanche) qui contient le jour donné
+def semaine(jour, praticien=None, chemin=None):
+    lundi = datetime.combine(jour - timedelta(days=jour.weekday()), datetime.min.time())
+    return entre(lundi, lundi + timedelta(days=7), praticien, chemin)
+
+
+# Fonction pour trouver les rendez-vous du praticien qui chevauchent un créneau (hors rendez-vous du patient lui-même)
+def conflits(debut, praticien, num_patient=None, duree=DUREE_RDV, chemin=None):
+    if not praticien:
+        return []
+    return [
+        rdv for rdv in entre(debut - duree + timedelta(minutes=1), debut + duree, praticien, chemin)
+        if rdv["num_patient"] != num_patient
+    ]
+
+
+# Données des rappels d'une journée, au format attendu par rappels_pdf.generate_rappels_pdf (sérialisable en JSON)
+def rappels(jour, praticien=None, chemin=None):
+    return [
+        {
+            "Nom et Prénom": rdv["nom_prenom"],
+            "Numéro du Patient": rdv["num_patient"],
+            "Praticien": rdv["praticien"],
+            "Date": rdv["debut"].strftime("%d.%m.%Y"),
+            "Heure": rdv["debut"].strftime("%H:%M"),
+        }
+        for rdv in agenda(jour, praticien, chemin)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agenda des prochains rendez-vous et rappels du jour.")
+    parser.add_argument("--jour", help="Jour (JJ.MM.AAAA, défaut : aujourd'hui)")
+    parser.add_argument("--praticien", help="Limiter à un praticien")
+    parser.add_argument("--semaine", action="store_true", help="Lister les patients attendus dans la semaine")
+    parser.add_argument("-o", "--sortie", help="PDF des rappels du jour (un document, une page par patient)")
+    args = parser.parse_args(argv)
+
+    jour = datetime.strptime(args.jour, "%d.%m.%Y").date() if args.jour else date.today()
+    rendez_vous = semaine(jour, args.praticien) if args.semaine else agenda(jour, args.praticien)
+    for rdv in rendez_vous:
+        print(f"{rdv['debut']:%d.%m.%Y %H:%M}  {rdv['num_patient']:<12} {rdv['nom_prenom'] or '':<30} {rdv['praticien'] or ''}")
+
+    if args.sortie:
+        from rappels_pdf import generate_rappels_pdf
+
+        debut = time.perf_counter()
+        donnees = rappels(jour, args.praticien)
+        generate_rappels_pdf(donnees, args.sortie)
+        print(f"{len(donnees)} rappels écrits dans {args.sortie} en {time.perf_counter() - debut:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
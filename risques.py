@@ -0,0 +1,265 @@
+import argparse
+import json
+import sys
+import time
+
+import stockage
+from cbip import normaliser_nom
+
+# Alertes déduites de l'anamnèse (médicaments, pathologies, allergies, tabac, grossesse) pour les actes de la séance.
+# Les règles sont précompilées à l'import en tables de hachage (mot-clé -> classes) : l'évaluation d'une anamnèse
+# ne fait qu'une recherche par mot saisi, quel que soit le nombre de règles.
+# Le même moteur sert au dépistage en lot de toutes les visites enregistrées (à lancer la nuit, par cron par exemple) :
+#
+#   python risques.py --sortie alertes.jsonl
+
+# Niveaux d'alerte, du plus au moins important
+ELEVE, MODERE, INFO = "élevé", "modéré", "info"
+NIVEAUX = [ELEVE, MODERE, INFO]
+
+# Classes (médicaments, antécédents) : libellé et mots-clés (DCI, noms commerciaux, termes de l'anamnèse), normalisés
+CLASSES = {
+    "antiresorptif": ("Bisphosphonate / antirésorptif", [
+        "alendronate", "fosamax", "fosavance", "risedronate", "actonel", "ibandronate", "bonviva", "zoledronate",
+        "zoledronique", "aclasta", "zometa", "pamidronate", "aredia", "denosumab", "prolia", "xgeva", "bisphosphonate",
+        "bisphosphonates", "biphosphonate", "biphosphonates",
+    ]),
+    "anticoagulant": ("Anticoagulant", [
+        "warfarine", "marevan", "acenocoumarol", "sintrom", "phenprocoumone", "marcoumar", "rivaroxaban", "xarelto",
+        "apixaban", "eliquis", "dabigatran", "pradaxa", "edoxaban", "lixiana", "heparine", "enoxaparine", "clexane",
+        "nadroparine", "fraxiparine", "tinzaparine", "innohep", "avk", "aod", "anticoagulant", "anticoagulants",
+    ]),
+    "antiagregant": ("Antiagrégant plaquettaire", [
+        "aspirine", "asaflow", "cardioaspirine", "aspegic", "clopidogrel", "plavix", "prasugrel", "efient", "ticagrelor",
+        "brilique", "antiagregant", "antiagregants",
+    ]),
+    "hemostase": ("Trouble de l'hémostase", [
+        "hemophilie", "willebrand", "thrombopenie", "thrombocytopenie", "cirrhose",
+    ]),
+    "diabete": ("Diabète", [
+        "diabete", "diabetique", "metformine", "glucophage", "metformax", "insuline", "lantus", "novorapid", "humalog",
+        "gliclazide", "diamicron", "glimepiride", "amarylle", "sitagliptine", "januvia", "janumet", "empagliflozine",
+        "jardiance", "dapagliflozine", "forxiga", "semaglutide", "ozempic", "dulaglutide", "trulicity",
+    ]),
+    "endocardite": ("Risque d'endocardite infectieuse", [
+        "endocardite", "valvulaire", "valve", "valves", "tavi",
+    ]),
+    "immunodepression": ("Immunodépression", [
+        "prednisolone", "prednisone", "medrol", "methylprednisolone", "dexamethasone", "corticoide", "corticoides",
+        "methotrexate", "ledertrexate", "ciclosporine", "neoral", "tacrolimus", "prograft", "azathioprine", "imuran",
+        "chimiotherapie", "chimio", "vih", "greffe", "transplantation", "immunosuppresseur", "immunosuppresseurs",
+    ]),
+    "hyperplasie": ("Accroissement gingival médicamenteux", [
+        "phenytoine", "diphantoine", "ciclosporine", "neoral", "nifedipine", "adalat", "amlodipine", "amlor", "norvasc",
+        "diltiazem", "verapamil", "isoptine",
+    ]),
+    "radiotherapie": ("Radiothérapie cervico-faciale", [
+        "radiotherapie", "irradiation", "radiotherapeutique",
+    ]),
+    "respiratoire": ("Affection respiratoire", [
+        "asthme", "asthmatique", "bpco", "emphyseme", "ventolin", "salbutamol", "seretide", "symbicort",
+    ]),
+}
+
+# Allergies (champ « Allergies » uniquement)
+ALLERGIES = {
+    "allergie_chlorhexidine": ("Allergie à la chlorhexidine", ["chlorhexidine", "chx", "corsodyl", "perioaid"]),
+    "allergie_latex": ("Allergie au latex", ["latex"]),
+    "allergie_penicilline": ("Allergie aux pénicillines", ["penicilline", "penicillines", "amoxicilline", "clamoxyl", "augmentin"]),
+    "allergie_anesthesique": ("Allergie aux anesthésiques locaux", ["lidocaine", "articaine", "mepivacaine", "anesthesique", "xylocaine"]),
+}
+
+# Risques par classe : (acte de l'ACJ concerné ou None pour toute la séance, niveau, conduite à tenir).
+# « Extraction » n'est pas un acte de l'ACJ : l'alerte est affichée pour la séance, à transmettre au dentiste.
+RISQUES = {
+    "antiresorptif": [
+        ("Extraction", ELEVE, "Risque d'ostéonécrose des maxillaires : extraction et chirurgie à discuter avec le dentiste et le médecin."),
+        ("Surfaçage", MODERE, "Antirésorptif : surfaçage atraumatique, surveiller la cicatrisation (ostéonécrose)."),
+    ],
+    "anticoagulant": [
+        ("Surfaçage", ELEVE, "Risque hémorragique : INR récent (AVK) ou horaire de la prise (AOD), hémostase locale prévue."),
+        ("Extraction", ELEVE, "Anticoagulant : ne pas interrompre sans avis du médecin ; hémostase locale."),
+        ("Detartrage", INFO, "Anticoagulant : saignement plus important possible pendant le détartrage."),
+    ],
+    "antiagregant": [
+        ("Surfaçage", MODERE, "Antiagrégant : saignement prolongé possible, ne pas interrompre le traitement ; hémostase locale."),
+    ],
+    "hemostase": [
+        ("Surfaçage", ELEVE, "Trouble de l'hémostase : surfaçage à programmer avec le médecin traitant."),
+        ("Detartrage", MODERE, "Trouble de l'hémostase : saignement prolongé possible."),
+    ],
+    "diabete": [
+        (None, MODERE, "Diabète : facteur de risque parodontal, demander le dernier HbA1c."),
+        ("Surfaçage", MODERE, "Diabète : cicatrisation plus lente et risque infectieux si le diabète est mal équilibré."),
+    ],
+    "endocardite": [
+        ("Surfaçage", ELEVE, "Risque d'endocardite infectieuse : antibioprophylaxie à discuter avant le geste."),
+        ("Detartrage", ELEVE, "Risque d'endocardite infectieuse : antibioprophylaxie à discuter avant le geste."),
+    ],
+    "immunodepression": [
+        (None, MODERE, "Immunodépression : risque infectieux et cicatrisation retardée."),
+        ("Surfaçage", MODERE, "Immunodépression : avis médical avant un surfaçage étendu."),
+    ],
+    "hyperplasie": [
+        (None, INFO, "Médicament associé à un accroissement gingival : contrôle de plaque renforcé."),
+    ],
+    "radiotherapie": [
+        ("Extraction", ELEVE, "Radiothérapie cervico-faciale : risque d'ostéoradionécrose, extraction à discuter avec le dentiste."),
+        ("Surfaçage", MODERE, "Radiothérapie cervico-faciale : geste atraumatique, fluoration renforcée."),
+    ],
+    "respiratoire": [
+        ("AirFlow", MODERE, "Affection respiratoire : aéropolissage déconseillé (aérosol de poudre), aspiration renforcée."),
+    ],
+    "tabac": [
+        (None, INFO, "Tabac : facteur de risque parodontal, le saignement au sondage peut être masqué."),
+    ],
+    "grossesse": [
+        (None, INFO, "Grossesse : gingivite gravidique fréquente, séance en position semi-assise."),
+        ("RX", MODERE, "Grossesse : radiographies à limiter au strict nécessaire (tablier plombé)."),
+    ],
+    "allergie_chlorhexidine": [
+        (None, ELEVE, "Allergie à la chlorhexidine : pas de bain de bouche ni de gel CHX (RP-P compris)."),
+    ],
+    "allergie_latex": [
+        (None, ELEVE, "Allergie au latex : gants et digues sans latex."),
+    ],
+    "allergie_penicilline": [
+        (None, MODERE, "Allergie aux pénicillines : à signaler pour toute antibioprophylaxie."),
+    ],
+    "allergie_anesthesique": [
+        ("Surfaçage", ELEVE, "Allergie à un anesthésique local : vérifier le produit avant l'anesthésie."),
+    ],
+}
+
+LIBELLES = {classe: libelle for classe, (libelle, _) in {**CLASSES, **ALLERGIES}.items()}
+LIBELLES.update({"tabac": "Tabac", "grossesse": "Grossesse"})
+
+# Champs de l'anamnèse (noms des widgets / de VisitePatient) lus comme texte libre
+CHAMPS_TEXTE = ["medicament", "pathologie", "operations", "biphosphonate_details", "drogue_details"]
+
+
+# Tables précompilées : mot normalisé -> classes
+def _indexer(classes):
+    index = {}
+    for classe, (_, mots) in classes.items():
+        for mot in mots:
+            index.setdefault(normaliser_nom(mot), []).append(classe)
+    return {mot: tuple(classes_mot) for mot, classes_mot in index.items()}
+
+
+INDEX_ANAMNESE = _indexer(CLASSES)
+INDEX_ALLERGIES = _indexer(ALLERGIES)
+
+
+def _mots(texte):
+    if not texte or not isinstance(texte, str):
+        return []
+    return normaliser_nom("".join(c if c.isalnum() else " " for c in texte)).split()
+
+
+# Fonction pour trouver les classes présentes dans une anamnèse : {classe: mot qui l'a déclenchée}
+def classes_anamnese(champs):
+    trouvees = {}
+    for champ in CHAMPS_TEXTE:
+        for mot in _mots(champs.get(champ)):
+            for classe in INDEX_ANAMNESE.get(mot, ()):
+                trouvees.setdefault(classe, mot)
+    for mot in _mots(champs.get("allergies")):
+        for classe in INDEX_ALLERGIES.get(mot, ()):
+            trouvees.setdefault(classe, mot)
+    if champs.get("biphosphonate") in ("Oui", "Antécédent"):
+        trouvees.setdefault("antiresorptif", "biphosphonate")
+    if champs.get("cigarette") == "Oui":
+        trouvees.setdefault("tabac", "cigarette")
+    if champs.get("enceinte") == "Oui":
+        trouvees.setdefault("grossesse", "enceinte")
+    return trouvees
+
+
+# Fonction pour évaluer une anamnèse : liste d'alertes (dictionnaires), les plus importantes d'abord
+def evaluer(champs):
+    alertes = [
+        {"classe": classe, "libelle": LIBELLES[classe], "motif": motif, "acte": acte, "niveau": niveau, "message": message}
+        for classe, motif in classes_anamnese(champs).items()
+        for acte, niveau, message in RISQUES[classe]
+    ]
+    alertes.sort(key=lambda alerte: NIVEAUX.index(alerte["niveau"]))
+    return alertes
+
+
+# Fonction pour filtrer les alertes d'une séance : celles des actes donnés ou, avec actes=None, les alertes générales
+# (sans acte, ou pour un acte qui ne fait pas partie des actes proposés)
+def alertes_actes(alertes, actes=None, actes_proposes=()):
+    if actes is None:
+        return [alerte for alerte in alertes if alerte["acte"] is None or alerte["acte"] not in actes_proposes]
+    return [alerte for alerte in alertes if alerte["acte"] in actes]
+
+
+# Fonction pour retrouver les champs de l'anamnèse depuis les données d'un rapport (visites enregistrées, importées).
+# Les champs déjà connus (formulaire enregistré avec la visite) sont gardés : le rapport ne complète que les manquants.
+# Le rapport écrit le détail à la place de la réponse Oui / Antécédent : la réponse reste alors inconnue plutôt que
+# d'être prise pour « Oui » (un ancien fumeur n'est pas un fumeur) ; le détail est lu comme texte libre.
+def champs_rapport(data, champs=None):
+    champs = dict(champs or {})
+    rapport = {"allergies": data.get("Allergies"), "operations": data.get("Opérations"), "enceinte": data.get("Enceinte")}
+    anm = data.get("ANM")
+    if isinstance(anm, str):
+        _, _, reste = anm.partition(": ")
+        rapport["medicament"], _, rapport["pathologie"] = reste.partition(" - ")
+    for cle, champ in (("Biphosphonate", "biphosphonate"), ("Cigarette", "cigarette"), ("Drogue", "drogue")):
+        valeur = data.get(cle)
+        if valeur in (None, "Non", "Oui", "Antécédent"):
+            rapport[champ] = valeur
+        else:
+            rapport[f"{champ}_details"] = valeur
+    for champ, valeur in rapport.items():
+        if champs.get(champ) in (None, ""):
+            champs[champ] = valeur
+    return champs
+
+
+# Champs de l'anamnèse depuis l'état du formulaire enregistré avec la visite (plus complet que le rapport)
+def champs_formulaire(formulaire):
+    widgets = formulaire.get("widgets", {})
+    return {champ: widgets.get(champ) for champ in CHAMPS_TEXTE + ["allergies", "biphosphonate", "cigarette", "enceinte"]}
+
+
+# Dépistage en lot : dernière visite de chaque patient de la base, évaluée avec le même moteur.
+# Générateur de (patient, alertes) pour les patients qui ont au moins une alerte du niveau demandé ou plus important.
+def depister(niveau_min=INFO, chemin=None):
+    niveaux = set(NIVEAUX[:NIVEAUX.index(niveau_min) + 1])
+    dernieres = {}
+    for visite_id, data, formulaire in stockage.parcourir_visites(chemin=chemin, avec_formulaire=True):
+        num_patient = data.get("Numéro du Patient")
+        if num_patient:
+            # Visites parcourues par date : la dernière lue est la plus récente ; seuls les champs utiles sont gardés
+            champs = champs_rapport(data, champs_formulaire(formulaire) if formulaire else None)
+            dernieres[num_patient] = (visite_id, data.get("Nom et Prénom"), data.get("Date d'aujourd'hui"), champs)
+    for num_patient, (visite_id, nom_prenom, date_visite, champs) in dernieres.items():
+        alertes = [alerte for alerte in evaluer(champs) if alerte["niveau"] in niveaux]
+        if alertes:
+            yield {"num_patient": num_patient, "nom_prenom": nom_prenom, "visite_id": visite_id, "date_visite": date_visite}, alertes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dépistage des risques de l'anamnèse sur toutes les visites enregistrées.")
+    parser.add_argument("--sortie", help="Fichier JSONL des patients avec alertes (défaut : sortie standard)")
+    parser.add_argument("--niveau", choices=NIVEAUX, default=INFO, help="Niveau minimal des alertes retenues")
+    args = parser.parse_args(argv)
+
+    debut = time.perf_counter()
+    sortie = open(args.sortie, "w", encoding="utf-8") if args.sortie else sys.stdout
+    patients = 0
+    try:
+        for patient, alertes in depister(args.niveau):
+            sortie.write(json.dumps(dict(patient, alertes=alertes), ensure_ascii=False) + "\n")
+            patients += 1
+    finally:
+        if args.sortie:
+            sortie.close()
+    print(f"{patients} patient(s) avec alertes en {time.perf_counter() - debut:.2f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import os
+import uuid
+from datetime import datetime
+
+import config
+import profilage
+
+MIME_TYPES = {"pdf": "application/pdf", "txt": "text/plain"}
+
+
+# Fonction pour le rapport texte : une ligne "clé: valeur" par champ de prepare_data (relu par import_rapports.py)
+@profilage.chronometre("generate_text_report")
+def generate_text_report(data):
+    report = f"Rapport Patient\n\n"
+    for key, value in data.items():
+        report += f"{key}: {value}\n"  # Simplest way to add all key-value pairs
+    return report
+
+
+# Fonction pour construire le nom d'un document : Prefixe_Nom_Prenom_AAAAMMJJ_HHMMSS.ext
+def nom_fichier(prefixe, nom_prenom, extension):
+    horodatage = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if nom_prenom:
+        return f"{prefixe}_{nom_prenom.replace(' ', '_')}_{horodatage}.{extension}"
+    return f"{prefixe}_{horodatage}.{extension}"
+
+
+# Fonction pour archiver un document dans ARCHIVE_DIR, si configuré. Retourne le chemin ou None.
+def archiver(filename, contenu, archive_dir=None):
+    archive_dir = archive_dir or config.ARCHIVE_DIR
+    if not archive_dir:
+        return None
+    if isinstance(contenu, str):
+        contenu = contenu.encode("utf-8")
+    os.makedirs(archive_dir, exist_ok=True)
+    chemin = os.path.join(archive_dir, os.path.basename(filename))
+    try:
+        f = open(chemin, "xb")
+    except FileExistsError:
+        # Deux sessions dans la même seconde : suffixe unique plutôt que d'écraser
+        racine, extension = os.path.splitext(chemin)
+        chemin = f"{racine}_{uuid.uuid4().hex[:8]}{extension}"
+        f = open(chemin, "xb")
+    with f:
+        f.write(contenu)
+    return chemin
@@ -0,0 +1,303 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import chemin_donnees
+from visite import COLONNES_MESURES, mesures_visite
+
+# Base locale des visites : SQLite en mode WAL (lectures concurrentes pendant une écriture)
+CHEMIN_BASE = os.environ.get("ANM_DB_PATH") or chemin_donnees("visites.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS visites (
+    id INTEGER PRIMARY KEY,
+    num_patient TEXT NOT NULL,
+    nom_prenom TEXT,
+    date_visite TEXT,
+    praticien TEXT,
+    enregistre_le TEXT NOT NULL,
+    donnees TEXT NOT NULL,
+    formulaire TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_visites_patient ON visites(num_patient, date_visite);
+CREATE INDEX IF NOT EXISTS idx_visites_nom ON visites(nom_prenom COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_visites_date ON visites(date_visite);
+CREATE TABLE IF NOT EXISTS imports (
+    fichier TEXT PRIMARY KEY,
+    visite_id INTEGER,
+    importe_le TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rendez_vous (
+    num_patient TEXT PRIMARY KEY,
+    visite_id INTEGER NOT NULL REFERENCES visites(id),
+    date_visite TEXT,
+    debut TEXT NOT NULL,
+    nom_prenom TEXT,
+    praticien TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_rendez_vous_debut ON rendez_vous(debut, num_patient);
+CREATE INDEX IF NOT EXISTS idx_rendez_vous_praticien ON rendez_vous(praticien, debut, num_patient);
+CREATE TABLE IF NOT EXISTS meta (
+    cle TEXT PRIMARY KEY,
+    valeur INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (cle, valeur) VALUES ('ecritures', 0);
+CREATE TABLE IF NOT EXISTS mesures (
+    visite_id INTEGER PRIMARY KEY REFERENCES visites(id),
+    %s
+);
+""" % ",\n    ".join(f"{colonne} INTEGER" for colonne in COLONNES_MESURES)
+
+TAILLE_POOL = 4  # connexions ouvertes au plus par base, partagées par toutes les sessions du serveur
+ATTENTE_CONNEXION = 30  # secondes d'attente d'une connexion libre
+
+_pools = {}
+_verrou = threading.Lock()
+
+
+# Connexions d'une base, réutilisées d'un thread à l'autre : Streamlit exécute chaque rerun dans un nouveau thread,
+# une connexion par thread serait ouverte (et le schéma vérifié) à chaque rerun sans jamais être fermée
+class _Pool:
+    def __init__(self, chemin, taille):
+        self.chemin = chemin
+        self._libres = queue.LifoQueue()
+        self._places = threading.BoundedSemaphore(taille)
+
+    def prendre(self):
+        if not self._places.acquire(timeout=ATTENTE_CONNEXION):
+            raise sqlite3.OperationalError("Base des visites occupée : aucune connexion libre.")
+        try:
+            return self._libres.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            con = sqlite3.connect(self.chemin, timeout=10, check_same_thread=False)
+            con.row_factory = sqlite3.Row
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            return con
+        except BaseException:
+            self._places.release()
+            raise
+
+    def rendre(self, con):
+        if con.in_transaction:
+            con.rollback()  # transaction laissée ouverte par une exception : la connexion repart propre
+        self._libres.put(con)
+        self._places.release()
+
+
+# Création du schéma et calculs de rattrapage : une fois par base et par processus
+def _initialiser(con):
+    nouvel_index = con.execute("SELECT 1 FROM sqlite_master WHERE name = 'rendez_vous'").fetchone() is None
+    con.executescript(SCHEMA)
+    completer_mesures(con)
+    if nouvel_index:
+        completer_rendez_vous(con)
+
+
+def _pool(chemin):
+    with _verrou:
+        pool = _pools.get(chemin)
+        if pool is None:
+            pool = _Pool(chemin, TAILLE_POOL)
+            con = pool.prendre()
+            try:
+                _initialiser(con)
+            finally:
+                pool.rendre(con)
+            _pools[chemin] = pool
+        return pool
+
+
+# Connexion à la base le temps d'un bloc with, rendue ensuite au pool :
+#   with connexion() as con, con:  # la seconde forme ouvre une transaction
+@contextmanager
+def connexion(chemin=None):
+    pool = _pool(chemin or CHEMIN_BASE)
+    con = pool.prendre()
+    try:
+        yield con
+    finally:
+        pool.rendre(con)
+
+
+def _inserer_mesures(con, visite_id, data):
+    con.execute(
+        f"INSERT OR REPLACE INTO mesures (visite_id, {', '.join(COLONNES_MESURES)})"
+        f" VALUES (?{', ?' * len(COLONNES_MESURES)})",
+        (visite_id, *mesures_visite(data)),
+    )
+
+
+# Fonction pour calculer les mesures des visites enregistrées avant la création de la table
+def completer_mesures(con):
+    rows = con.execute(
+        "SELECT id, donnees FROM visites WHERE id NOT IN (SELECT visite_id FROM mesures)"
+    ).fetchall()
+    with con:
+        for row in rows:
+            _inserer_mesures(con, row["id"], json.loads(row["donnees"]))
+
+
+# Prochain rendez-vous d'un patient, tiré de sa visite la plus récente (index des rendez-vous, voir rendezvous.py).
+# Un rendez-vous qui n'est pas postérieur au jour de la visite est la valeur par défaut du formulaire : la visite n'a
+# pas de prochain rendez-vous, et celui d'une visite plus ancienne (déjà passé ou annulé) sort de l'index.
+def _indexer_rendez_vous(con, visite_id, data):
+    num_patient = data.get("Numéro du Patient")
+    if not num_patient:
+        return
+    debut = debut_rdv(data.get("Prochain Rendez-vous"))
+    date_visite = date_iso(data.get("Date d'aujourd'hui"))
+    if not debut or (date_visite and debut[:10] <= date_visite):
+        con.execute(
+            "DELETE FROM rendez_vous WHERE num_patient = ? AND (date_visite IS NULL OR date_visite <= ?)",
+            (num_patient, date_visite),
+        )
+        return
+    con.execute(
+        "INSERT INTO rendez_vous (num_patient, visite_id, date_visite, debut, nom_prenom, praticien)"
+        " VALUES (?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT(num_patient) DO UPDATE SET visite_id = excluded.visite_id, date_visite = excluded.date_visite,"
+        " debut = excluded.debut, nom_prenom = excluded.nom_prenom, praticien = excluded.praticien"
+        " WHERE excluded.date_visite IS NULL OR rendez_vous.date_visite IS NULL"
+        " OR excluded.date_visite >= rendez_vous.date_visite",
+        (num_patient, visite_id, date_visite, debut, data.get("Nom et Prénom"), data.get("Praticien")),
+    )
+
+
+# Fonction pour indexer les rendez-vous des visites enregistrées avant la création de la table
+def completer_rendez_vous(con):
+    rows = con.execute("SELECT id, donnees FROM visites ORDER BY date_visite, id").fetchall()
+    with con:
+        for row in rows:
+            _indexer_rendez_vous(con, row["id"], json.loads(row["donnees"]))
+
+
+# Fonction pour convertir le prochain rendez-vous du rapport ("JJ.MM.AAAA HH:MM") au format ISO, triable par SQLite
+def debut_rdv(texte):
+    if not texte:
+        return None
+    try:
+        return datetime.strptime(texte, "%d.%m.%Y %H:%M").isoformat(timespec="minutes")
+    except ValueError:
+        return None
+
+
+# Fonction pour convertir une date du rapport ("JJ.MM.AAAA") au format ISO, triable par SQLite
+def date_iso(texte):
+    if not texte:
+        return None
+    try:
+        return datetime.strptime(texte, "%d.%m.%Y").date().isoformat()
+    except ValueError:
+        return None
+
+
+# Compteur d'écritures (voir version), incrémenté dans la transaction de chaque insertion ou remplacement
+def _noter_ecriture(con):
+    con.execute("UPDATE meta SET valeur = valeur + 1 WHERE cle = 'ecritures'")
+
+
+def _visite(row):
+    if row is None:
+        return None
+    visite = dict(row)
+    visite["donnees"] = json.loads(visite["donnees"])
+    visite["formulaire"] = json.loads(visite["formulaire"]) if visite["formulaire"] else None
+    return visite
+
+
+# Fonction pour insérer une visite dans une transaction ouverte par l'appelant (enregistrement, import par lots)
+def inserer_visite(con, data, formulaire=None):
+    num_patient = data.get("Numéro du Patient")
+    if not num_patient:
+        raise ValueError("Le numéro du patient est requis pour enregistrer la visite.")
+    cur = con.execute(
+        "INSERT INTO visites (num_patient, nom_prenom, date_visite, praticien, enregistre_le, donnees, formulaire)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            num_patient, data.get("Nom et Prénom"), date_iso(data.get("Date d'aujourd'hui")), data.get("Praticien"),
+            datetime.now().isoformat(timespec="seconds"), json.dumps(data, ensure_ascii=False),
+            json.dumps(formulaire, ensure_ascii=False) if formulaire is not None else None,
+        ),
+    )
+    _inserer_mesures(con, cur.lastrowid, data)
+    _indexer_rendez_vous(con, cur.lastrowid, data)
+    _noter_ecriture(con)
+    return cur.lastrowid
+
+
+# Fonction pour remplacer les données d'une visite existante (rapport modifié à la main, par exemple)
+def remplacer_visite(con, visite_id, data):
+    con.execute(
+        "UPDATE visites SET nom_prenom = ?, praticien = ?, donnees = ? WHERE id = ?",
+        (data.get("Nom et Prénom"), data.get("Praticien"), json.dumps(data, ensure_ascii=False), visite_id),
+    )
+    _inserer_mesures(con, visite_id, data)
+    _indexer_rendez_vous(con, visite_id, data)
+    _noter_ecriture(con)
+
+
+# Fonction pour enregistrer une visite : données du rapport (prepare_data), état du formulaire et mesures numériques
+def enregistrer_visite(data, formulaire=None, chemin=None):
+    with connexion(chemin) as con, con:
+        return inserer_visite(con, data, formulaire)
+
+
+# Fonction pour retrouver la visite la plus récente d'un patient
+def derniere_visite(num_patient, chemin=None):
+    with connexion(chemin) as con:
+        row = con.execute(
+            "SELECT * FROM visites WHERE num_patient = ? ORDER BY date_visite DESC, id DESC LIMIT 1", (num_patient,)
+        ).fetchone()
+    return _visite(row)
+
+
+# Fonction pour retrouver les patients dont le nom commence par le texte saisi (sans tenir compte de la casse),
+# du plus récemment vu au plus ancien : [{"num_patient", "nom_prenom", "date_visite"}] (recherche dans idx_visites_nom)
+def rechercher_patients(nom, limite=5, chemin=None):
+    nom = nom.strip()
+    if not nom:
+        return []
+    motif = nom.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    with connexion(chemin) as con:
+        rows = con.execute(
+            "SELECT num_patient, nom_prenom, MAX(date_visite) AS date_visite FROM visites"
+            " WHERE nom_prenom LIKE ? ESCAPE '\\' GROUP BY num_patient ORDER BY date_visite DESC LIMIT ?",
+            (motif, limite),
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+# Générateur sur les visites enregistrées (id, données), par date : le curseur SQLite est lu au fil de l'eau.
+# Avec avec_formulaire, l'état du formulaire (ou None pour une visite importée) suit les données.
+def parcourir_visites(depuis=None, jusqua=None, chemin=None, avec_formulaire=False):
+    conditions, parametres = [], []
+    if depuis:
+        conditions.append("date_visite >= ?")
+        parametres.append(depuis)
+    if jusqua:
+        conditions.append("date_visite <= ?")
+        parametres.append(jusqua)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    colonnes = "id, donnees, formulaire" if avec_formulaire else "id, donnees"
+    with connexion(chemin) as con:
+        for row in con.execute(f"SELECT {colonnes} FROM visites {where} ORDER BY date_visite, id", parametres):
+            if avec_formulaire:
+                yield row["id"], json.loads(row["donnees"]), json.loads(row["formulaire"]) if row["formulaire"] else None
+            else:
+                yield row["id"], json.loads(row["donnees"])
+
+
+# Marqueur (nombre de visites, nombre d'écritures) qui change à chaque enregistrement, y compris quand une visite
+# est remplacée sans changer le nombre de lignes (pour invalider les calculs mis en cache)
+def version(chemin=None):
+    with connexion(chemin) as con:
+        return tuple(con.execute(
+            "SELECT (SELECT COUNT(*) FROM visites), valeur FROM meta WHERE cle = 'ecritures'"
+        ).fetchone())
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+import stockage
+from visite import COLONNES_DEPOTS, COLONNES_DPSI, COLONNES_MESURES, DPSI_CODES
+
+# Suivi longitudinal du DPSI et des dépôts : tous les calculs sont vectorisés sur l'ensemble des visites
+# (un DataFrame trié par patient puis date, pas de boucle par patient).
+
+# Intervalle de rappel conseillé (mois) selon le pire sextant DPSI de la dernière visite
+RAPPEL_DPSI = {5: 3, 4: 4, 3: 6}  # "4", "3+", "3-"
+RAPPEL_DEPOTS = 6  # dépôts "+++" ou plus
+RAPPEL_DEFAUT = 12
+RAPPEL_MINIMUM = 3
+
+
+# Fonction pour charger les mesures de toutes les visites (ou d'un patient) depuis la base locale.
+# Les visites sans date (rapports importés sans "Date d'aujourd'hui") ne se placent pas dans le temps : elles sont ignorées.
+def charger_mesures(num_patient=None, chemin=None):
+    requete = (
+        f"SELECT v.id AS visite_id, v.num_patient, v.nom_prenom, v.date_visite, {', '.join(f'm.{c}' for c in COLONNES_MESURES)}"
+        " FROM visites v JOIN mesures m ON m.visite_id = v.id WHERE v.date_visite IS NOT NULL"
+    )
+    parametres = ()
+    if num_patient:
+        requete += " AND v.num_patient = ?"
+        parametres = (num_patient,)
+    with stockage.connexion(chemin) as con:
+        mesures = pd.read_sql_query(requete, con, params=parametres, parse_dates=["date_visite"])
+    mesures[COLONNES_MESURES] = mesures[COLONNES_MESURES].astype("float64")
+    return mesures.sort_values(["num_patient", "date_visite", "visite_id"], kind="stable", ignore_index=True)
+
+
+# Fonction pour ajouter, à chaque visite, la variation de chaque mesure depuis la visite précédente du patient
+def variations(mesures):
+    ecarts = mesures.groupby("num_patient", sort=False)[COLONNES_MESURES].diff()
+    return mesures.join(ecarts.add_prefix("delta_"))
+
+
+# Fonction pour résumer l'évolution de chaque patient (une ligne par patient) :
+# progression par sextant depuis la première visite, part des sextants améliorés / aggravés depuis la visite précédente,
+# et intervalle de rappel conseillé
+def tendances(mesures):
+    suivi = variations(mesures)
+    groupes = suivi.groupby("num_patient", sort=False)
+    derniere = groupes.tail(1).set_index("num_patient")
+    premiere = groupes[COLONNES_DPSI].first()
+
+    resume = derniere[["nom_prenom", "date_visite"]].rename(columns={"date_visite": "derniere_visite"})
+    resume["visites"] = groupes.size()
+
+    dpsi = derniere[COLONNES_DPSI].to_numpy()
+    progression = dpsi - premiere.loc[derniere.index].to_numpy()
+    for i, colonne in enumerate(COLONNES_DPSI):
+        resume[f"progression_{colonne}"] = progression[:, i]
+
+    delta = derniere[[f"delta_{c}" for c in COLONNES_DPSI]].to_numpy()
+    compares = (~np.isnan(delta)).sum(axis=1)
+    ameliores = (delta < 0).sum(axis=1)
+    aggraves = (delta > 0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        resume["part_amelioree"] = np.where(compares > 0, ameliores / compares, np.nan)
+        resume["part_aggravee"] = np.where(compares > 0, aggraves / compares, np.nan)
+    resume["sextants_compares"] = compares
+
+    dpsi_max = derniere[COLONNES_DPSI].max(axis=1).fillna(0).to_numpy()
+    depots_max = derniere[COLONNES_DEPOTS].max(axis=1).fillna(0).to_numpy()
+    resume["dpsi_max"] = np.array([None] + DPSI_CODES, dtype=object)[dpsi_max.astype(int)]
+    resume["rappel_mois"] = intervalle_rappel(dpsi_max, depots_max, aggraves > ameliores)
+    resume["prochain_rappel"] = resume["derniere_visite"] + pd.to_timedelta(resume["rappel_mois"] * 30.44, unit="D").dt.round("D")
+    return resume
+
+
+# Fonction vectorisée pour l'intervalle de rappel (mois) ; une aggravation rapproche le rappel d'un cran
+def intervalle_rappel(dpsi_max, depots_max, aggravation):
+    intervalle = np.select(
+        [dpsi_max >= rang for rang in RAPPEL_DPSI] + [depots_max >= 3],
+        list(RAPPEL_DPSI.values()) + [RAPPEL_DEPOTS],
+        default=RAPPEL_DEFAUT,
+    )
+    return np.where(aggravation, np.maximum(RAPPEL_MINIMUM, intervalle // 2), intervalle)
+
+
+# Fonction pour la synthèse du cabinet : part des sextants améliorés / aggravés sur l'ensemble des patients suivis
+def synthese(resume):
+    compares = resume["sextants_compares"].sum()
+    return {
+        "patients": len(resume),
+        "visites": int(resume["visites"].sum()),
+        "part_amelioree": float((resume["part_amelioree"] * resume["sextants_compares"]).sum() / compares) if compares else None,
+        "part_aggravee": float((resume["part_aggravee"] * resume["sextants_compares"]).sum() / compares) if compares else None,
+    }
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Les modules lisent leur configuration à l'import : dossier de données jetable et CBIP injoignable par défaut
+os.environ["ANM_DATA_DIR"] = tempfile.mkdtemp(prefix="anm_tests_")
+os.environ.pop("ANM_ARCHIVE_DIR", None)
+os.environ.pop("ANM_EXPORT_DIR", None)
+os.environ.pop("ANM_DB_PATH", None)
+os.environ["CBIP_API_URL"] = "http://127.0.0.1:9/"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
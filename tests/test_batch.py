@@ -0,0 +1,65 @@
+import json
+import zipfile
+from io import BytesIO
+
+from pypdf import PdfReader
+
+import batch
+
+
+def texte_pdf(contenu):
+    return "\n".join(page.extract_text() for page in PdfReader(BytesIO(contenu)).pages)
+
+
+def test_charger_patients_csv(tmp_path):
+    chemin = tmp_path / "patients.csv"
+    chemin.write_text(
+        "Nom et Prénom;Numéro du Patient;IHO Technique de brossage;Conseil de dentifrice\n"
+        "Dupont Marie;0012;Bass;Elmex\n"
+        "Martin Luc;0013;;\n",  # ligne incomplète : colonnes vides omises
+        encoding="utf-8",
+    )
+    assert batch.charger_patients(str(chemin)) == [
+        {"Nom et Prénom": "Dupont Marie", "Numéro du Patient": "0012", "IHO Technique de brossage": "Bass",
+         "Conseil de dentifrice": "Elmex"},
+        {"Nom et Prénom": "Martin Luc", "Numéro du Patient": "0013"},
+    ]
+
+
+def test_charger_patients_jsonl_colonnes_manquantes(tmp_path):
+    chemin = tmp_path / "patients.jsonl"
+    lignes = [
+        {"Nom et Prénom": "Dupont Marie", "Numéro du Patient": "0012", "Bain de bouche": "CHX", "CHX - Combien de jours": "7 jours"},
+        {"Nom et Prénom": "Martin Luc"},
+    ]
+    chemin.write_text("".join(json.dumps(ligne, ensure_ascii=False) + "\n" for ligne in lignes), encoding="utf-8")
+    # Numéro gardé comme texte (pas de conversion en nombre), colonnes absentes de la ligne omises
+    assert batch.charger_patients(str(chemin)) == lignes
+
+
+def test_cli_zip(tmp_path, capsys):
+    patients = tmp_path / "patients.csv"
+    patients.write_text(
+        "Nom et Prénom,IHO Technique de brossage,Produits d'hygiène\nDupont Marie,Bass,Elmex Gel\nMartin Luc,,\n",
+        encoding="utf-8",
+    )
+    sortie = tmp_path / "conseils.zip"
+    assert batch.main([str(patients), "-o", str(sortie), "--workers", "1"]) == 0
+    assert "2 documents générés" in capsys.readouterr().out
+    with zipfile.ZipFile(sortie) as archive:
+        noms = archive.namelist()
+        assert [nom[:29] for nom in noms] == ["0001_Conseils_Hygiene_Dupont_", "0002_Conseils_Hygiene_Martin_"]
+        premier, second = (texte_pdf(archive.read(nom)) for nom in noms)
+    assert "Dupont Marie" in premier and "Méthode Bass" in premier and "elmex gel" in premier
+    assert "Martin Luc" in second and "Méthode Bass" not in second
+
+
+def test_cli_pdf_fusionne(tmp_path):
+    patients = tmp_path / "patients.jsonl"
+    patients.write_text(
+        "".join(json.dumps({"Nom et Prénom": f"Patient {i}"}) + "\n" for i in range(3)), encoding="utf-8",
+    )
+    sortie = tmp_path / "conseils.pdf"
+    assert batch.main([str(patients), "-o", str(sortie), "--workers", "2"]) == 0
+    texte = texte_pdf(sortie.read_bytes())
+    assert [texte.index(f"Patient {i}") for i in range(3)] == sorted(texte.index(f"Patient {i}") for i in range(3))
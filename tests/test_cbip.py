@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import cbip
+
+MEDICAMENTS = {"dafalgan": [{"nom": "Dafalgan", "molecule": "paracétamol"}], "daflon": [{"nom": "Daflon"}]}
+
+
+# Serveur CBIP de test : 200 avec les données connues, 200 vide sinon, 500 pour "panne"
+class Bouchon(BaseHTTPRequestHandler):
+    appels = []
+
+    def do_GET(self):
+        nom = parse_qs(urlparse(self.path).query).get("nom", [""])[0]
+        Bouchon.appels.append(nom)
+        if nom == "panne":
+            self.send_response(500)
+            self.end_headers()
+            return
+        corps = json.dumps(MEDICAMENTS.get(cbip.normaliser_nom(nom), [])).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serveur(monkeypatch, tmp_path):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Bouchon)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    Bouchon.appels = []
+    monkeypatch.setattr(cbip, "CBIP_URL", f"http://127.0.0.1:{httpd.server_port}/")
+    monkeypatch.setattr(cbip, "_cache", cbip.CacheTTL())
+    monkeypatch.setattr(cbip, "_index", cbip.IndexMedicaments(str(tmp_path / "index.json")))
+    yield Bouchon.appels
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_resultat_mis_en_cache(serveur):
+    assert cbip.verifier_medicament("Dafalgan") == (True, MEDICAMENTS["dafalgan"])
+    # Même médicament, autre casse et accent : servi par le cache, sans appel réseau
+    assert cbip.verifier_medicament("  DAFALGÂN ") == (True, MEDICAMENTS["dafalgan"])
+    assert serveur == ["Dafalgan"]
+
+
+def test_index_local_persiste_et_sert_hors_ligne(serveur, tmp_path):
+    cbip.verifier_medicament("Dafalgan")
+    cbip._cache.clear()
+    assert cbip.verifier_medicament("dafalgan") == (True, MEDICAMENTS["dafalgan"])
+    assert len(serveur) == 1
+    with open(tmp_path / "index.json", encoding="utf-8") as f:
+        assert json.load(f) == {"dafalgan": MEDICAMENTS["dafalgan"]}
+
+
+def test_medicament_inconnu(serveur):
+    assert cbip.verifier_medicament("Inconnu") == (False, "Médicament non trouvé dans CBIP.")
+    assert cbip.verifier_medicament("inconnu")[0] is False
+    assert serveur == ["Inconnu"]
+
+
+def test_erreur_api_expiree_apres_ttl(serveur, monkeypatch):
+    monkeypatch.setattr(cbip, "TTL_ERREUR", 0.05)
+    assert cbip.verifier_medicament("panne") == (False, "Erreur API CBIP : 500")
+    assert cbip.verifier_medicament("panne") == (False, "Erreur API CBIP : 500")
+    assert len(serveur) == 1
+    time.sleep(0.1)
+    cbip.verifier_medicament("panne")
+    assert len(serveur) == 2
+
+
+def test_erreur_de_connexion(monkeypatch, tmp_path):
+    monkeypatch.setattr(cbip, "CBIP_URL", "http://127.0.0.1:9/")
+    monkeypatch.setattr(cbip, "_cache", cbip.CacheTTL())
+    monkeypatch.setattr(cbip, "_index", cbip.IndexMedicaments(str(tmp_path / "index.json")))
+    valide, message = cbip.verifier_medicament("Dafalgan")
+    assert not valide
+    assert message.startswith("Erreur de connexion à CBIP")
+
+
+def test_nom_vide():
+    assert cbip.verifier_medicament("   ") == (False, "Nom de médicament vide.")
+
+
+def test_cache_ttl_et_lru():
+    cache = cbip.CacheTTL(taille_max=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)  # "b" est le moins récemment utilisé
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    cache.set("d", 4, ttl=-1)
+    assert cache.get("d") is None
+
+
+def test_index_recherche_par_prefixe(serveur):
+    cbip.verifier_medicament("Dafalgan")
+    cbip.verifier_medicament("Daflon")
+    assert cbip._index.commencant_par("daf") == ["dafalgan", "daflon"]
+    assert cbip._index.commencant_par("dafl") == ["daflon"]
+    assert cbip._index.commencant_par("x") == []
+    assert cbip.noms_connus() == ["Dafalgan", "Daflon"]
+    # Préfixe sans correspondance : raccourci jusqu'à trois lettres
+    assert cbip.suggestions("Dafxyz") == ["Dafalgan", "Daflon"]
+    assert cbip.suggestions("Zzz") == []
+
+
+def test_statut_explicite_de_l_api(serveur, monkeypatch):
+    assert cbip._interroger_cbip("Dafalgan") == (cbip.TROUVE, MEDICAMENTS["dafalgan"])
+    assert cbip._interroger_cbip("Inconnu")[0] == cbip.ABSENT
+    assert cbip._interroger_cbip("panne")[0] == cbip.ERREUR
+    # Un médicament absent garde la durée de vie des résultats, quel que soit le libellé du message
+    monkeypatch.setattr(cbip, "TTL_ERREUR", 0.01)
+    monkeypatch.setattr(cbip, "_interroger_cbip", lambda nom: (serveur.append(nom), (cbip.ABSENT, "Introuvable."))[1])
+    assert cbip.verifier_medicament("Autre") == (False, "Introuvable.")
+    time.sleep(0.05)
+    cbip.verifier_medicament("Autre")
+    assert serveur.count("Autre") == 1
+
+
+def test_import_sans_creer_le_dossier_de_donnees(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    dossier = tmp_path / "donnees"
+    env = dict(os.environ, ANM_DATA_DIR=str(dossier))
+    env.pop("CBIP_INDEX_PATH", None)
+    racine = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", "import cbip"], cwd=racine, env=env, check=True)
+    assert not dossier.exists()
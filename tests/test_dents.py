@@ -0,0 +1,47 @@
+from dents import PRESENT, RISQUE, QUADRANTS, Constats
+
+
+def constats_exemple():
+    constats = Constats()
+    constats.marquer("16", "Dent manquante")
+    constats.marquer("14", "Suspicion de carie")
+    constats.marquer("14", "Suspicion de carie", "M")
+    constats.marquer("14", "Suspicion de carie", "O")
+    constats.noter("14", "Suspicion de carie", "Préciser", "sous le bord")
+    constats.marquer("36", "Composite")
+    constats.marquer("36", "Composite", "L")
+    constats.marquer("46", "Implant", valeur=RISQUE)
+    constats.noter("46", "Implant", "Risque", "mobilité")
+    constats.marquer("26", "Couronne sur dent")
+    constats.noter_quadrant("Q3", "contrôle dans 6 mois")
+    return constats
+
+
+def test_details_quadrant_au_format_des_rapports():
+    constats = constats_exemple()
+    q1 = constats.details_quadrant("Q1")
+    assert q1["Dent manquante"] == ["16"]
+    assert q1["Suspicion de carie"] == {
+        "14": {"M": "Non", "O": "Non", "Préciser": "sous le bord", "Vérifier par le dentiste": "Oui"},
+    }
+    assert constats.details_quadrant("Q4")["Implant"] == {"46": {"État": "Risque", "Risque": "mobilité"}}
+    assert constats.details_quadrant("Q2")["Couronne sur dent"] == {"26": {"État": "OK"}}
+    assert constats.details_quadrant("Q3")["Autre"] == "contrôle dans 6 mois"
+    assert constats.details_quadrant("Q3", ["Composite"]) == {"Composite": {"36": {"L": "Non"}}}
+
+
+def test_aller_retour_par_le_rapport():
+    constats = constats_exemple()
+    data = {q: constats.details_quadrant(q) for q in QUADRANTS}
+    relu = Constats.depuis_rapport(data)
+    assert relu.grille == constats.grille
+    assert relu.autres == constats.autres
+    assert {q: relu.details_quadrant(q) for q in QUADRANTS} == data
+    assert sorted(relu) == sorted(constats)
+
+
+def test_depuis_rapport_tolerant():
+    # Rapport importé : quadrant absent ou texte brut, dents inconnues ignorées
+    relu = Constats.depuis_rapport({"Q1": "texte modifié à la main", "Q2": {"Dent manquante": ["99", "27"]}})
+    assert list(relu) == [("27", "Dent", "Dent manquante", PRESENT)]
+    assert not Constats.depuis_rapport({})
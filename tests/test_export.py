@@ -0,0 +1,45 @@
+from datetime import date
+
+from export import ajouter_jsonl, enregistrement, lire_jsonl, SCHEMA_VERSION
+
+
+def test_ajouter_puis_lire_jsonl(tmp_path):
+    data = {"Numéro du Patient": "1234", "Date d'aujourd'hui": "14.03.2025", "DPSI": "1/2/3- | 1/4/3+",
+            "BF": "++ (Gen.)", "Q1": {"Dent manquante": ["16"]}}
+    premier = enregistrement(data, visite_id=1)
+    second = enregistrement({"Numéro du Patient": "5678"}, visite_id=2)
+    chemin = ajouter_jsonl(premier, export_dir=str(tmp_path), jour=date(2025, 3, 14))
+    assert ajouter_jsonl(second, export_dir=str(tmp_path), jour=date(2025, 3, 14)) == chemin
+    assert chemin == str(tmp_path / "visites_2025-03-14.jsonl")
+    assert list(lire_jsonl(chemin)) == [premier, second]
+
+
+def test_enregistrement():
+    record = enregistrement({"Numéro du Patient": "1234", "Date d'aujourd'hui": "14.03.2025",
+                             "DPSI": "1/2/3- | 1/4/3+", "BF": "++ (Gen.)"}, visite_id=7)
+    assert record["schema_version"] == SCHEMA_VERSION
+    assert (record["visite_id"], record["num_patient"], record["date_visite"]) == (7, "1234", "2025-03-14")
+    assert record["mesures"]["sext3"] == 3 and record["mesures"]["sext6"] == 1
+    assert record["mesures"]["bf"] == 2 and record["mesures"]["tr"] is None
+
+
+def test_sans_dossier_export(monkeypatch):
+    monkeypatch.setattr("config.EXPORT_DIR", None)
+    assert ajouter_jsonl(enregistrement({})) is None
+
+
+def test_parquet_age_non_numerique(tmp_path):
+    import pyarrow.parquet as pq
+
+    from export import ecrire_parquet
+
+    records = [
+        enregistrement({"Numéro du Patient": "1", "Âge": 45, "Q1": {"Dent manquante": ["16"]}}, visite_id=1),
+        enregistrement({"Numéro du Patient": "2", "Âge": "45 ans"}, visite_id=2),  # rapport modifié à la main
+    ]
+    chemin = tmp_path / "visites.parquet"
+    assert ecrire_parquet(records, str(chemin), taille_lot=1) == 2
+    table = pq.read_table(chemin).to_pylist()
+    assert [ligne["Âge"] for ligne in table] == [45, None]
+    assert table[0]["Q1"] == '{"Dent manquante": ["16"]}' and table[0]["autres"] is None
+    assert table[1]["autres"] == '{"Âge": "45 ans"}'
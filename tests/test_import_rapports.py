@@ -0,0 +1,32 @@
+from import_rapports import parser_rapport
+from sorties import generate_text_report
+
+
+def test_aller_retour_rapport_texte():
+    data = {
+        "Nom et Prénom": "Dupont Marie",
+        "Numéro du Patient": "1234",
+        "Âge": 45,
+        "Date d'aujourd'hui": "14.03.2025",
+        "Q1": {"Dent manquante": ["16"], "Implant": {"15": {"État": "OK"}}},
+        "Usures dentaires": {"Attrition": ["Q1", "Q2"]},
+        "Espaces Interdentaires Maxillaire": "14-13: Brossettes: TePe, 0.8mm\n13-12: Fil dentaire",
+        "Justifier le diagnostique": "BOP: 30 %",
+    }
+    lignes = generate_text_report(data).splitlines(keepends=True)
+    assert parser_rapport(lignes) == data
+
+
+def test_entete_et_valeurs_modifiees_a_la_main():
+    lignes = [
+        "Rapport Patient\n",
+        "\n",
+        "Q2: {modifié à la main\n",
+        "Clé inconnue: reste dans la valeur précédente\n",
+        "Âge: quarante\n",
+    ]
+    assert parser_rapport(lignes) == {
+        "Q2": "{modifié à la main\nClé inconnue: reste dans la valeur précédente",
+        "Âge": "quarante",
+    }
+    assert parser_rapport([]) == {}
@@ -0,0 +1,107 @@
+import json
+import os
+import time
+
+import pytest
+
+import journal
+
+
+@pytest.fixture(autouse=True)
+def dossier(monkeypatch, tmp_path):
+    monkeypatch.setattr("config.DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(journal, "_nettoye", False)
+    return tmp_path / journal.DOSSIER
+
+
+def lignes(jrnl):
+    with open(jrnl.chemin, encoding="utf-8") as f:
+        return [json.loads(ligne) for ligne in f]
+
+
+def test_seules_les_differences_sont_ecrites():
+    jrnl = journal.Journal(journal.nouvel_identifiant())
+    jrnl.noter({"nom_prenom": "Dupont", "num_patient": "12", "boissons": ["Café"]})
+    jrnl.vider()
+    jrnl.noter({"nom_prenom": "Dupont Marie", "num_patient": "12"})
+    jrnl.noter({"nom_prenom": "Dupont Marie", "num_patient": "12"})  # rien de nouveau
+    jrnl.vider()
+    assert [(entree["m"], entree.get("s")) for entree in lignes(jrnl)] == [
+        ({"nom_prenom": "Dupont", "num_patient": "12", "boissons": ["Café"]}, None),
+        ({"nom_prenom": "Dupont Marie"}, ["boissons"]),
+    ]
+    assert journal.charger(jrnl.identifiant) == {"nom_prenom": "Dupont Marie", "num_patient": "12"}
+
+
+def test_ecriture_differee(monkeypatch):
+    monkeypatch.setattr(journal, "DELAI_ECRITURE", 0.2)
+    monkeypatch.setattr(journal, "DELAI_MAXIMUM", 0.5)
+    jrnl = journal.Journal(journal.nouvel_identifiant())
+    debut = time.monotonic()
+    # Saisie continue : chaque modification repousse l'écriture, mais pas au-delà de DELAI_MAXIMUM
+    while not os.path.exists(jrnl.chemin):
+        assert time.monotonic() - debut < 2
+        jrnl.noter({"nom_prenom": f"Dupont {time.monotonic()}"})
+        time.sleep(0.05)
+    assert 0.4 <= time.monotonic() - debut
+    assert len(lignes(jrnl)) == 1
+
+
+def test_compaction(monkeypatch):
+    monkeypatch.setattr(journal, "COMPACTION_LIGNES", 3)
+    jrnl = journal.Journal(journal.nouvel_identifiant())
+    for i in range(7):
+        jrnl.noter({"nom_prenom": "Dupont", "compteur": i})
+        jrnl.vider()
+        assert len(lignes(jrnl)) <= 3
+    assert journal.charger(jrnl.identifiant) == {"nom_prenom": "Dupont", "compteur": 6}
+    jrnl._compacter()
+    assert [entree["m"] for entree in lignes(jrnl)] == [{"nom_prenom": "Dupont", "compteur": 6}]
+
+
+def test_reprise_apres_ligne_tronquee():
+    identifiant = journal.nouvel_identifiant()
+    with open(journal.chemin_journal(identifiant), "w", encoding="utf-8") as f:
+        f.write(json.dumps({"m": {"nom_prenom": "Dupont", "num_patient": "12"}}) + "\n")
+        f.write(json.dumps({"m": {"num_patient": "13"}, "s": ["nom_prenom"]}) + "\n")
+        f.write('{"m": {"nom_prenom": "Dup')  # arrêt brutal pendant l'écriture
+    jrnl, etat = journal.ouvrir(identifiant)
+    assert etat == {"num_patient": "13"}
+    # Le journal repart d'une ligne propre : les ajouts suivants restent lisibles
+    assert [entree["m"] for entree in lignes(jrnl)] == [{"num_patient": "13"}]
+    jrnl.noter({"num_patient": "14"})
+    jrnl.vider()
+    assert journal.charger(identifiant) == {"num_patient": "14"}
+
+
+def test_nettoyage_des_brouillons_abandonnes(dossier):
+    ancien, recent = journal.nouvel_identifiant(), journal.nouvel_identifiant()
+    for identifiant in (ancien, recent):
+        with open(journal.chemin_journal(identifiant), "w", encoding="utf-8") as f:
+            f.write(json.dumps({"m": {"num_patient": "12"}}) + "\n")
+    vieux = time.time() - journal.CONSERVATION - 60
+    os.utime(journal.chemin_journal(ancien), (vieux, vieux))
+    journal.ouvrir(journal.nouvel_identifiant())
+    assert sorted(os.listdir(dossier)) == [f"{recent}.jsonl"]
+
+
+def test_brouillon_vide_apres_enregistrement():
+    identifiant = journal.nouvel_identifiant()
+    jrnl, _ = journal.ouvrir(identifiant)
+    formulaire = {"nom_prenom": "Dupont", "num_patient": "12"}
+    jrnl.noter(formulaire)
+    jrnl.vider()
+    jrnl.effacer(formulaire)
+    assert not os.path.exists(jrnl.chemin)
+    # Même URL rouverte (session encore en mémoire ou serveur redémarré) : rien à reprendre
+    assert journal.ouvrir(identifiant)[1] == {}
+    assert journal.charger(identifiant) == {}
+    jrnl.noter(formulaire)  # exécution suivante, formulaire inchangé
+    jrnl.vider()
+    assert not os.path.exists(jrnl.chemin)
+    # Nouvelle saisie après l'enregistrement : le brouillon porte de nouveau le formulaire complet
+    jrnl.noter({"nom_prenom": "Dupont", "num_patient": "12", "allergies": "Pénicilline"})
+    jrnl.vider()
+    assert journal.ouvrir(identifiant)[1] == journal.charger(identifiant) == {
+        "nom_prenom": "Dupont", "num_patient": "12", "allergies": "Pénicilline",
+    }
@@ -0,0 +1,70 @@
+from io import BytesIO
+
+from pypdf import PdfReader
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import PageBreak, SimpleDocTemplate
+
+from odontogramme import NOM_GABARIT, odontogramme_rapport
+
+PATIENT_1 = {
+    "DPSI": "1/2/3- | 3+/4/1",
+    "Q1": {"Suspicion de carie": {"16": {"M": "Non", "O": "Non", "Vérifier par le dentiste": "Oui"}}},
+    "Q3": {"Dent manquante": ["36"]},
+}
+PATIENT_2 = {
+    "DPSI": "2/2/2 | 2/2/2",
+    "Q2": {"Composite": {"24": {"D": "Non"}}},
+    "Q4": {"Implant": {"46": {"État": "Risque", "Risque": "mobilité"}}},
+}
+
+
+# Canevas qui compte les définitions du gabarit
+class CanevasEspion(Canvas):
+    definitions = []
+
+    def beginForm(self, name, *args, **kwargs):
+        CanevasEspion.definitions.append(name)
+        super().beginForm(name, *args, **kwargs)
+
+
+def rendre(*patients):
+    CanevasEspion.definitions = []
+    sortie = BytesIO()
+    story = []
+    for data in patients:
+        if story:
+            story.append(PageBreak())
+        story.append(odontogramme_rapport(data))
+    SimpleDocTemplate(sortie, pagesize=A4).build(story, canvasmaker=CanevasEspion)
+    return PdfReader(BytesIO(sortie.getvalue()))
+
+
+def formes(page):
+    xobjets = page["/Resources"]["/XObject"]
+    return {nom: xobjets.raw_get(nom).idnum for nom in xobjets if NOM_GABARIT in nom}
+
+
+def test_gabarit_defini_une_fois_par_document():
+    pdf = rendre(PATIENT_1, PATIENT_2)
+    assert CanevasEspion.definitions == [NOM_GABARIT]
+    page_1, page_2 = pdf.pages
+    # Les deux pages dessinent le même objet (un seul Form XObject dans le fichier)
+    assert formes(page_1) == formes(page_2) and len(formes(page_1)) == 1
+    # Seuls les constats diffèrent d'un patient à l'autre
+    assert page_1.get_contents().get_data() != page_2.get_contents().get_data()
+
+
+def test_constats_hors_du_gabarit():
+    # Le gabarit ne dépend pas du patient : les constats sont dessinés sur la page, pas dans le Form XObject
+    gabarits = []
+    for data in (PATIENT_1, PATIENT_2):
+        page = rendre(data).pages[0]
+        (nom,) = formes(page)
+        gabarits.append(page["/Resources"]["/XObject"][nom].get_data())
+    assert gabarits[0] == gabarits[1]
+
+
+def test_rien_a_dessiner():
+    assert odontogramme_rapport({"Nom et Prénom": "Dupont"}) is None
+    assert odontogramme_rapport({"Q1": {"Dent manquante": []}}) is None
@@ -0,0 +1,63 @@
+import risques
+import stockage
+
+
+def classes(alertes):
+    return {alerte["classe"] for alerte in alertes}
+
+
+def test_evaluer_mots_cles_normalises():
+    alertes = risques.evaluer({"medicament": "Xarelto 20mg, Metformine", "pathologie": "Diabète type 2"})
+    assert classes(alertes) == {"anticoagulant", "diabete"}
+    assert [alerte["niveau"] for alerte in alertes] == sorted(
+        (alerte["niveau"] for alerte in alertes), key=risques.NIVEAUX.index)
+    anticoagulant = [alerte for alerte in alertes if alerte["classe"] == "anticoagulant"]
+    assert {alerte["acte"] for alerte in anticoagulant} == {"Surfaçage", "Extraction", "Detartrage"}
+    assert anticoagulant[0]["motif"] == "xarelto"
+
+
+def test_evaluer_allergies_et_reponses():
+    # Les allergies ne sont lues que dans leur champ : "CHX" prescrit n'est pas une allergie
+    assert classes(risques.evaluer({"medicament": "CHX", "allergies": "Latex"})) == {"allergie_latex"}
+    assert classes(risques.evaluer({"cigarette": "Oui", "enceinte": "Oui"})) == {"tabac", "grossesse"}
+    assert classes(risques.evaluer({"cigarette": "Antécédent", "enceinte": "Non"})) == set()
+    assert classes(risques.evaluer({"biphosphonate": "Antécédent"})) == {"antiresorptif"}
+    assert risques.evaluer({}) == []
+
+
+def test_alertes_actes():
+    alertes = risques.evaluer({"medicament": "Eliquis", "pathologie": "asthme", "cigarette": "Oui"})
+    actes = {alerte["acte"] for alerte in risques.alertes_actes(alertes, ["Surfaçage", "AirFlow"])}
+    assert actes == {"Surfaçage", "AirFlow"}
+    # Alertes générales : sans acte, ou pour un acte que l'ACJ ne propose pas (Extraction)
+    generales = risques.alertes_actes(alertes, actes_proposes=["Surfaçage", "Detartrage", "AirFlow"])
+    assert {(alerte["classe"], alerte["acte"]) for alerte in generales} == {("tabac", None), ("anticoagulant", "Extraction")}
+
+
+def test_champs_rapport_ne_devine_pas_la_reponse():
+    champs = risques.champs_rapport({"Cigarette": "arrêté en 2010", "Biphosphonate": "Fosamax 2015-2018", "Drogue": "Non"})
+    assert champs.get("cigarette") is None and champs["cigarette_details"] == "arrêté en 2010"
+    assert champs.get("biphosphonate") is None and champs["drogue"] == "Non"
+    # Le formulaire enregistré garde sa réponse, le rapport complète les champs manquants
+    champs = risques.champs_rapport({"Cigarette": "arrêté en 2010", "Allergies": "latex"}, {"cigarette": "Antécédent", "allergies": ""})
+    assert (champs["cigarette"], champs["allergies"]) == ("Antécédent", "latex")
+
+
+def test_depister(tmp_path):
+    base = str(tmp_path / "visites.sqlite3")
+
+    def enregistrer(num_patient, jour, formulaire=None, **champs):
+        stockage.enregistrer_visite({"Numéro du Patient": num_patient, "Nom et Prénom": f"Patient {num_patient}",
+                                     "Date d'aujourd'hui": jour, **champs}, formulaire, chemin=base)
+
+    enregistrer("1", "01.01.2024", Cigarette="Oui")
+    enregistrer("1", "01.01.2025", Cigarette="arrêté en 2024")  # ancien fumeur, rapport importé
+    enregistrer("2", "01.01.2025", {"widgets": {"cigarette": "Antécédent", "medicament": ""}}, Cigarette="5/j jusqu'en 2020")
+    enregistrer("3", "01.01.2025", Cigarette="Oui", ANM="ANM: Xarelto - FA")
+    enregistrer("4", "01.01.2025", {"widgets": {"cigarette": "Oui"}}, Cigarette="10/j")
+
+    resultats = {patient["num_patient"]: classes(alertes) for patient, alertes in risques.depister(chemin=base)}
+    assert resultats == {"3": {"tabac", "anticoagulant"}, "4": {"tabac"}}
+    eleves = {patient["num_patient"]: alertes for patient, alertes in risques.depister(risques.ELEVE, chemin=base)}
+    assert list(eleves) == ["3"]
+    assert {alerte["niveau"] for alerte in eleves["3"]} == {risques.ELEVE}
@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+import stockage
+
+
+def rapport(num_patient="1234", jour="14.03.2025", **champs):
+    data = {"Numéro du Patient": num_patient, "Nom et Prénom": "Dupont Marie", "Date d'aujourd'hui": jour,
+            "DPSI": "1/2/3- | 1/4/3+", "BF": "++ (Gen.)"}
+    data.update(champs)
+    return data
+
+
+@pytest.fixture
+def base(tmp_path):
+    return str(tmp_path / "visites.sqlite3")
+
+
+def test_enregistrer_puis_recharger(base):
+    formulaire = {"widgets": {"nom_prenom": "Dupont Marie"}}
+    premiere = stockage.enregistrer_visite(rapport(jour="01.02.2024"), chemin=base)
+    seconde = stockage.enregistrer_visite(rapport(), formulaire, chemin=base)
+    stockage.enregistrer_visite(rapport("5678"), chemin=base)
+    visite = stockage.derniere_visite("1234", chemin=base)
+    assert visite["id"] == seconde != premiere
+    assert visite["date_visite"] == "2025-03-14"
+    assert visite["donnees"] == rapport()
+    assert visite["formulaire"] == formulaire
+    assert stockage.derniere_visite("0000", chemin=base) is None
+
+
+def test_numero_patient_requis(base):
+    with pytest.raises(ValueError):
+        stockage.enregistrer_visite(rapport(num_patient=""), chemin=base)
+
+
+def test_parcourir_visites_par_date(base):
+    for jour in ("01.01.2025", "01.06.2025", "01.12.2025"):
+        stockage.enregistrer_visite(rapport(jour=jour), chemin=base)
+    jours = [data["Date d'aujourd'hui"] for _, data in stockage.parcourir_visites("2025-02-01", "2025-12-01", chemin=base)]
+    assert jours == ["01.06.2025", "01.12.2025"]
+    _, _, formulaire = next(stockage.parcourir_visites(chemin=base, avec_formulaire=True))
+    assert formulaire is None
+
+
+def test_mesures_enregistrees(base):
+    visite_id = stockage.enregistrer_visite(rapport(), chemin=base)
+    with stockage.connexion(base) as con:
+        row = con.execute("SELECT sext3, sext6, bf, tr FROM mesures WHERE visite_id = ?", (visite_id,)).fetchone()
+    assert tuple(row) == (3, 1, 2, None)
+
+
+def test_connexions_partagees_entre_threads(base):
+    stockage.enregistrer_visite(rapport(), chemin=base)
+    vues = set()
+
+    def lire():
+        with stockage.connexion(base) as con:
+            vues.add(id(con))
+            con.execute("SELECT COUNT(*) FROM visites").fetchone()
+
+    for _ in range(10):
+        thread = threading.Thread(target=lire)
+        thread.start()
+        thread.join()
+    # Un rerun Streamlit = un nouveau thread : la même connexion resservie, pas une nouvelle à chaque fois
+    assert len(vues) == 1
+
+
+def test_transaction_abandonnee_annulee(base):
+    with pytest.raises(RuntimeError):
+        with stockage.connexion(base) as con:
+            stockage.inserer_visite(con, rapport())
+            raise RuntimeError
+    assert stockage.derniere_visite("1234", chemin=base) is None
+
+
+def test_version_change_a_chaque_ecriture(base):
+    assert stockage.version(base) == (0, 0)
+    visite_id = stockage.enregistrer_visite(rapport(), chemin=base)
+    avant = stockage.version(base)
+    # Rapport modifié importé : même nombre de visites, mêmes identifiants, mais données changées
+    with stockage.connexion(base) as con, con:
+        stockage.remplacer_visite(con, visite_id, rapport(DPSI="4/4/4 | 4/4/4"))
+    assert stockage.version(base) != avant
+    assert stockage.version(base)[0] == 1
+
+
+def test_index_des_rendez_vous(base):
+    def prochain(num_patient="1234"):
+        with stockage.connexion(base) as con:
+            row = con.execute("SELECT debut FROM rendez_vous WHERE num_patient = ?", (num_patient,)).fetchone()
+        return row["debut"] if row else None
+
+    stockage.enregistrer_visite(rapport(jour="01.03.2025", **{"Prochain Rendez-vous": "01.09.2025 14:30"}), chemin=base)
+    assert prochain() == "2025-09-01T14:30"
+    # Visite plus ancienne (import) : le rendez-vous de la visite récente reste
+    stockage.enregistrer_visite(rapport(jour="01.01.2025", **{"Prochain Rendez-vous": "01.02.2025 09:00"}), chemin=base)
+    stockage.enregistrer_visite(rapport(jour="01.02.2025"), chemin=base)
+    assert prochain() == "2025-09-01T14:30"
+    # Visite plus récente sans prochain rendez-vous (ou avec la valeur par défaut, le jour même) : il sort de l'index
+    stockage.enregistrer_visite(rapport(jour="01.09.2025", **{"Prochain Rendez-vous": "01.09.2025 08:00"}), chemin=base)
+    assert prochain() is None
+
+
+def test_rechercher_patients_par_nom(base):
+    stockage.enregistrer_visite(rapport("1", "01.01.2024", **{"Nom et Prénom": "Dupont Marie"}), chemin=base)
+    stockage.enregistrer_visite(rapport("1", "01.01.2025", **{"Nom et Prénom": "Dupont-Martin Marie"}), chemin=base)
+    stockage.enregistrer_visite(rapport("2", "01.06.2025", **{"Nom et Prénom": "DUPUIS Paul"}), chemin=base)
+    stockage.enregistrer_visite(rapport("3", "01.06.2025", **{"Nom et Prénom": "Martin_Luc"}), chemin=base)
+    assert stockage.rechercher_patients("dup", chemin=base) == [
+        {"num_patient": "2", "nom_prenom": "DUPUIS Paul", "date_visite": "2025-06-01"},
+        {"num_patient": "1", "nom_prenom": "Dupont-Martin Marie", "date_visite": "2025-01-01"},
+    ]
+    assert [p["num_patient"] for p in stockage.rechercher_patients("dupont", chemin=base)] == ["1"]
+    assert stockage.rechercher_patients("%", chemin=base) == []
+    assert stockage.rechercher_patients("  ", chemin=base) == []
+    with stockage.connexion(base) as con:
+        plan = con.execute("EXPLAIN QUERY PLAN SELECT 1 FROM visites WHERE nom_prenom LIKE 'dup%'").fetchall()
+    assert "idx_visites_nom" in str([tuple(ligne) for ligne in plan])
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import stockage
+import tendances
+
+
+def visite(num_patient, jour, dpsi, **champs):
+    data = {"Numéro du Patient": num_patient, "Nom et Prénom": f"Patient {num_patient}", "DPSI": dpsi}
+    if jour:
+        data["Date d'aujourd'hui"] = jour
+    data.update(champs)
+    return data
+
+
+@pytest.fixture
+def mesures(tmp_path):
+    base = str(tmp_path / "visites.sqlite3")
+    for data in [
+        visite("A", "01.07.2025", "2/2/2 | 2/2/2"),
+        visite("A", "01.01.2025", "3-/3-/3- | 3-/3-/3-"),
+        visite("B", "01.03.2025", "4/1/1 | 1/1/1", BF="+++"),
+        visite("C", "01.01.2025", "1/1/1 | 1/1/1"),
+        visite("C", "01.06.2025", "3-/3-/3- | 3-/3-/3-"),
+        visite("C", None, "4/4/4 | 4/4/4"),  # rapport importé sans date : ignoré
+    ]:
+        stockage.enregistrer_visite(data, chemin=base)
+    return tendances.charger_mesures(chemin=base)
+
+
+def test_charger_mesures_trie_et_ignore_les_visites_sans_date(mesures):
+    assert list(mesures["num_patient"]) == ["A", "A", "B", "C", "C"]
+    assert mesures["date_visite"].notna().all()
+    assert list(mesures.loc[mesures["num_patient"] == "A", "sext1"]) == [3.0, 2.0]
+
+
+def test_variations(mesures):
+    suivi = tendances.variations(mesures)
+    assert np.isnan(suivi.loc[0, "delta_sext1"])  # première visite du patient
+    assert suivi.loc[1, "delta_sext1"] == -1
+    assert np.isnan(suivi.loc[2, "delta_sext1"])  # pas de différence entre deux patients
+    assert suivi.loc[4, "delta_sext6"] == 2
+
+
+def test_tendances(mesures):
+    resume = tendances.tendances(mesures)
+    a, b, c = resume.loc["A"], resume.loc["B"], resume.loc["C"]
+    assert (a["visites"], a["progression_sext1"], a["part_amelioree"], a["part_aggravee"]) == (2, -1, 1.0, 0.0)
+    assert (a["dpsi_max"], a["rappel_mois"]) == ("2", 12)
+    assert a["prochain_rappel"] == pd.Timestamp("2026-07-01")
+    assert (b["dpsi_max"], b["rappel_mois"], b["sextants_compares"]) == ("4", 3, 0)
+    assert np.isnan(b["part_amelioree"])
+    # Aggravation : rappel à 6 mois rapproché à 3
+    assert (c["visites"], c["dpsi_max"], c["part_aggravee"], c["rappel_mois"]) == (2, "3-", 1.0, 3)
+    assert tendances.synthese(resume) == {"patients": 3, "visites": 5, "part_amelioree": 0.5, "part_aggravee": 0.5}
+
+
+def test_tendances_sans_visite_datee(tmp_path):
+    base = str(tmp_path / "visites.sqlite3")
+    stockage.enregistrer_visite(visite("A", None, "1/1/1 | 1/1/1"), chemin=base)
+    resume = tendances.tendances(tendances.charger_mesures(chemin=base))
+    assert resume.empty
+    assert tendances.synthese(resume)["part_amelioree"] is None
+
+
+def test_intervalle_rappel():
+    dpsi_max = np.array([5, 4, 3, 2, 0, 3, 2])
+    depots_max = np.array([0, 0, 0, 3, 0, 0, 0])
+    aggravation = np.array([False, False, False, False, False, True, True])
+    assert list(tendances.intervalle_rappel(dpsi_max, depots_max, aggravation)) == [3, 4, 6, 6, 12, 3, 6]
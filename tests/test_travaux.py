@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+import travaux
+
+
+def attendre(file, cle):
+    for _ in range(600):
+        statut, valeur = file.prendre(cle)
+        if statut not in (travaux.EN_ATTENTE, travaux.EN_COURS):
+            return statut, valeur
+        time.sleep(0.05)
+    pytest.fail("rendu non terminé")
+
+
+def test_rendu_termine_et_partage():
+    file = travaux.FileRendu()
+    cle = file.lancer("json.dumps", {"a": 1})
+    assert file.lancer("json.dumps", {"a": 1}) == cle  # même demande : un seul rendu
+    assert attendre(file, cle) == (travaux.TERMINE, '{"a": 1}')
+    assert file.prendre(cle) == (travaux.TERMINE, '{"a": 1}')
+
+
+def test_erreur_gardee_pour_toutes_les_sessions():
+    file = travaux.FileRendu()
+    cle = file.lancer("json.loads", {"pas": "du texte"})
+    statut, erreur = attendre(file, cle)
+    assert statut == travaux.ERREUR and isinstance(erreur, TypeError)
+    # Une seconde session qui suit le même rendu voit la même erreur, pas un rendu "expiré"
+    assert file.prendre(cle) == (travaux.ERREUR, erreur)
+
+
+def test_eviction_lru():
+    file = travaux.FileRendu(taille_max=1)
+    premier = file.lancer("json.dumps", 1)
+    attendre(file, premier)
+    second = file.lancer("json.dumps", 2)
+    assert attendre(file, second) == (travaux.TERMINE, "2")
+    assert file.prendre(premier) == (travaux.INCONNU, None)
+
+
+def test_rendu_bloque_interrompu_puis_relance():
+    file = travaux.FileRendu(delai=1.0)
+    cle = file.lancer("time.sleep", 1.5)
+    assert file.prendre(cle)[0] in (travaux.EN_ATTENTE, travaux.EN_COURS)
+    statut, erreur = attendre(file, cle)
+    assert statut == travaux.ERREUR and isinstance(erreur, TimeoutError)
+    # Nouvelle demande : un nouveau rendu part, et l'issue tardive du premier ne prend pas sa place
+    assert file.lancer("time.sleep", 1.5) == cle
+    time.sleep(0.7)
+    assert file.prendre(cle) in ((travaux.EN_ATTENTE, None), (travaux.EN_COURS, None))
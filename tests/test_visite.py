@@ -0,0 +1,79 @@
+from datetime import date, datetime, time
+
+from visite import VisitePatient, build_data, interdental_entry
+
+
+def visite_exemple(**champs):
+    valeurs = dict(
+        nom_prenom="Dupont Marie",
+        num_patient="1234",
+        date_aujourdhui=date(2025, 3, 14),
+        date_naissance=date(1980, 1, 1),
+        prochain_rdv=datetime(2025, 9, 1, 14, 30),
+        hdd=time(9, 5),
+        praticien="Dr Martin",
+        sexe="Homme",
+        enceinte="Oui",
+        cigarette="Oui",
+        cigarette_details="10/j",
+        boissons=["Café"],
+        cafe_frequence="3",
+        the_frequence="2",
+        sext1="1", sext2="2", sext3="3-", sext4="3+", sext5="4", sext6="1",
+        bf_data=["++"],
+        bf_details={"locations": ["Gen.", "Sext"], "Sext": ["S1", "S2"]},
+    )
+    valeurs.update(champs)
+    return VisitePatient(**valeurs)
+
+
+def test_build_data_formate_les_champs():
+    data = build_data(visite_exemple())
+    assert data["Nom et Prénom"] == "Dupont Marie"
+    assert data["Date d'aujourd'hui"] == "14.03.2025"
+    assert data["Prochain Rendez-vous"] == "01.09.2025 14:30"
+    assert data["HDD"] == "09:05"
+    assert data["Cigarette"] == "10/j"
+    assert data["Boissons"] == "Café x/j"
+    assert data["Café"] == "3 x/j"
+    # DPSI dans l'ordre de la bouche : 1/2/3 | 6/5/4
+    assert data["DPSI"] == "1/2/3- | 1/4/3+"
+    assert data["BF"] == "++ (Gen., Sext: S1, S2)"
+    assert data["TR"] == "Inexistant"
+
+
+def test_build_data_omet_les_champs_vides_et_conditionnels():
+    data = build_data(visite_exemple())
+    assert "Thé" not in data  # fréquence sans la boisson cochée
+    assert "Enceinte" not in data  # seulement pour Sexe = Femme
+    assert "Allergies" not in data
+    assert None not in data.values()
+    assert build_data(visite_exemple(sexe="Femme"))["Enceinte"] == "Oui"
+    assert "DPSI" not in build_data(visite_exemple(sext6=""))
+
+
+def test_build_data_visite_vide():
+    data = build_data(VisitePatient())
+    assert set(data) == {"BF", "TR", "COL", "BOI", "BOP", "Espaces Interdentaires Maxillaire",
+                         "Espaces Interdentaires Mandibulaire"}
+
+
+def test_build_data_espaces_interdentaires():
+    selection = {
+        "14-13": interdental_entry(["Brossettes interdentaires"], "TePe", "0.8mm"),
+        "13-12": interdental_entry(["Brossettes interdentaires"], "TePe", "0.8mm"),
+        "37-38": interdental_entry(["Fil dentaire"]),
+    }
+    data = build_data(VisitePatient(
+        interdental_selection=selection,
+        all_interdental_data={"14-13": "Brossettes: TePe, 0.8mm", "37-38": "Fil dentaire"},
+    ))
+    assert data["Espaces Interdentaires Maxillaire"] == "14-13: Brossettes: TePe, 0.8mm"
+    assert data["Espaces Interdentaires Mandibulaire"] == "37-38: Fil dentaire"
+    assert data["Moyens interdentaires"] == {"Brossettes TePe 0.8mm": "14-13, 13-12", "Fil dentaire": "37-38"}
+
+
+def test_from_mapping_ignore_les_variables_inconnues():
+    visite = VisitePatient.from_mapping({"nom_prenom": "Dupont Marie", "st": object(), "tab1": None})
+    assert visite.nom_prenom == "Dupont Marie"
+    assert visite.boissons == []
@@ -0,0 +1,172 @@
+import hashlib
+import importlib
+import json
+import multiprocessing
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from importlib.machinery import ModuleSpec
+
+import profilage
+from config import PDF_WORKERS
+
+# Rendu des PDF dans un pool de processus borné, partagé par toutes les sessions du serveur :
+# le thread du script Streamlit ne fait qu'attendre (sans tenir le GIL), les autres formulaires restent fluides,
+# et le nombre de rendus simultanés ne dépasse jamais PDF_WORKERS.
+# Les rendus sont désignés par leur nom ("module.fonction") : ReportLab n'est importé que dans les processus du pool,
+# jamais dans le serveur Streamlit.
+
+RAPPORT_PDF = "rapport_pdf.generate_pdf"
+CONSEILS_PDF = "conseils_pdf.generate_hygiene_pdf"
+RAPPELS_PDF = "rappels_pdf.generate_rappels_pdf"
+# Modules chargés une fois dans le serveur de processus : chaque processus du pool démarre déjà prêt
+PRECHARGEMENT = ["rapport_pdf", "conseils_pdf", "rappels_pdf"]
+
+TAILLE_RESULTATS = 32  # documents terminés gardés en mémoire (LRU)
+DELAI_RENDU = 120  # secondes, attente dans le pool comprise : au-delà, le rendu est en erreur et peut être relancé
+
+# Statuts d'un rendu en arrière-plan
+EN_ATTENTE, EN_COURS, TERMINE, ERREUR, INCONNU = "en attente", "en cours", "terminé", "erreur", "inconnu"
+
+_pool = None
+_verrou = threading.Lock()
+
+
+# Le serveur Streamlit a plusieurs threads : pas de fork direct, les processus partent d'un serveur propre
+def _contexte():
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    contexte = multiprocessing.get_context("forkserver")
+    contexte.set_forkserver_preload(PRECHARGEMENT)
+    return contexte
+
+
+# Streamlit remplace __main__ par le script de l'app pendant son exécution : sans précaution, chaque nouveau processus
+# du pool ré-exécuterait tout le script. Les rendus n'ont pas besoin de __main__ (voir _executer) ; un __spec__ nommé
+# "__main__" indique à multiprocessing de ne pas le recharger.
+def _ignorer_main():
+    main = sys.modules.get("__main__")
+    if main is not None and getattr(main, "__spec__", None) is None:
+        main.__spec__ = ModuleSpec("__main__", None)
+
+
+# Exécuté dans un processus du pool
+def _executer(nom, *args):
+    module, _, fonction = nom.rpartition(".")
+    return getattr(importlib.import_module(module), fonction)(*args)
+
+
+def pool():
+    global _pool
+    with _verrou:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=_contexte())
+        return _pool
+
+
+def _reinitialiser(ancien):
+    global _pool
+    with _verrou:
+        if _pool is ancien:
+            _pool = None
+    ancien.shutdown(wait=False, cancel_futures=True)
+
+
+# Fonction pour soumettre un rendu (nom "module.fonction") ; renvoie un Future
+def soumettre(nom, *args):
+    executor = pool()
+    _ignorer_main()
+    try:
+        return executor.submit(_executer, nom, *args)
+    except BrokenProcessPool:
+        # Un processus du pool est mort (mémoire, signal) : on repart d'un pool neuf
+        _reinitialiser(executor)
+        return pool().submit(_executer, nom, *args)
+
+
+# Identifiant d'un rendu : la fonction et le contenu des données, de sorte qu'une même demande
+# (double clic, même visite dans deux sessions) ne soit rendue qu'une fois
+def cle_travail(nom, data):
+    contenu = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return f"{nom}:{hashlib.sha1(contenu.encode('utf-8')).hexdigest()}"
+
+
+# File de rendu : les demandes partent dans le pool, les rendus terminés (documents et erreurs) restent dans un petit
+# cache LRU, de sorte que plusieurs sessions qui suivent le même rendu en reçoivent toutes l'issue
+class FileRendu:
+    def __init__(self, taille_max=TAILLE_RESULTATS, delai=DELAI_RENDU):
+        self.taille_max = taille_max
+        self.delai = delai
+        self._termines = OrderedDict()  # clé -> (TERMINE, document) ou (ERREUR, exception)
+        self._en_cours = {}  # clé -> (future, échéance)
+        self._verrou = threading.Lock()
+
+    def lancer(self, nom, data):
+        cle = cle_travail(nom, data)
+        with self._verrou:
+            if cle in self._termines:
+                if self._termines[cle][0] == TERMINE:
+                    self._termines.move_to_end(cle)
+                    return cle
+                del self._termines[cle]  # nouvelle demande après une erreur : on réessaie
+            if cle in self._en_cours:
+                return cle
+            future = soumettre(nom, data)
+            self._en_cours[cle] = (future, time.monotonic() + self.delai)
+        debut = time.perf_counter()
+        future.add_done_callback(lambda f: self._terminer(cle, f, nom, debut))
+        return cle
+
+    def _ranger(self, cle, issue):
+        self._termines[cle] = issue
+        while len(self._termines) > self.taille_max:
+            self._termines.popitem(last=False)
+
+    # Le temps mesuré (profilage) va de la demande à la fin du rendu : attente dans le pool comprise
+    def _terminer(self, cle, future, nom, debut):
+        profilage.enregistrer(f"rendu.{nom.rpartition('.')[2]}", time.perf_counter() - debut)
+        with self._verrou:
+            # Rendu abandonné après son échéance (voir prendre) : son issue tardive est ignorée
+            if self._en_cours.get(cle, (None,))[0] is not future:
+                return
+            del self._en_cours[cle]
+            if future.cancelled():
+                return
+            erreur = future.exception()
+            self._ranger(cle, (ERREUR, erreur) if erreur is not None else (TERMINE, future.result()))
+
+    # Renvoie (statut, valeur) en une seule lecture : le document (TERMINE), l'exception du rendu (ERREUR), sinon None.
+    # Un rendu qui dépasse son échéance passe en erreur : une nouvelle demande le relance.
+    def prendre(self, cle):
+        with self._verrou:
+            if cle in self._termines:
+                self._termines.move_to_end(cle)
+                return self._termines[cle]
+            if cle in self._en_cours:
+                future, echeance = self._en_cours[cle]
+                if time.monotonic() <= echeance:
+                    return (EN_COURS if future.running() else EN_ATTENTE), None
+                del self._en_cours[cle]
+                future.cancel()
+                self._ranger(cle, (ERREUR, TimeoutError(f"rendu interrompu après {self.delai} s")))
+                return self._termines[cle]
+            return INCONNU, None
+
+    def clear(self):
+        with self._verrou:
+            self._termines.clear()
+
+
+_file = FileRendu()
+
+
+# Fonction pour lancer un rendu en arrière-plan ; renvoie l'identifiant à suivre avec prendre()
+def lancer(nom, data):
+    return _file.lancer(nom, data)
+
+
+def prendre(cle):
+    return _file.prendre(cle)
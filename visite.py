@@ -0,0 +1,389 @@
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, time
+
+# Espaces interdentaires, dans l'ordre de l'arcade
+MAXILLAIRE_SPACES = [
+    "18-17", "17-16", "16-15", "15-14", "14-13", "13-12", "12-11", "11-21",
+    "21-22", "22-23", "23-24", "24-25", "25-26", "26-27", "27-28"
+]
+MANDIBULAIRE_SPACES = [
+    "48-47", "47-46", "46-45", "45-44", "44-43", "43-42", "42-41", "41-31",
+    "31-32", "32-33", "33-34", "34-35", "35-36", "36-37", "37-38"
+]
+
+# Moyens interdentaires et leurs détails
+INTERDENTAL_METHODS = ["Brossettes interdentaires", "Fil dentaire", "Porte fil", "Soft pick", "Aucun"]
+BROSSETTES_MARQUES = ["Curaprox", "Interprox", "TePe", "Gum"]
+BROSSETTES_TAILLES = ["0.6 mm", "0.7 mm", "0.8mm", "O.9mm", "1.1mm", "1.3mm", "1.5mm", "1.9mm", "2.2mm", "2.7mm"]
+SOFT_PICK_TAILLES = ["Small", "Medium", "Large"]
+# Début du libellé de chaque moyen dans les espaces regroupés ("Brossettes TePe 0.8mm: 14-13, 13-12")
+LIBELLES_MOYENS = {"Brossettes interdentaires": "Brossettes", "Fil dentaire": "Fil dentaire", "Porte fil": "Porte fil", "Soft pick": "Soft pick"}
+
+# Sections du rapport, dans l'ordre des onglets (clés de prepare_data)
+SECTIONS = [
+    ("Informations patient", [
+        "Nom et Prénom", "Numéro du Patient", "Date de Naissance", "Âge", "Date d'aujourd'hui", "HDD",
+        "Prochain Rendez-vous", "Praticien",
+    ]),
+    ("Anamnèse", [
+        "RP-P", "ANM", "Allergies", "Opérations", "Cigarette", "Drogue", "Biphosphonate", "Douleur quelconque",
+        "PDP", "Dernière visite", "Sexe", "Enceinte", "Contraception", "Activité",
+    ]),
+    ("Habitudes alimentaires", ["ALIM", "Boissons", "Thé", "Café", "Soda", "Sucre"]),
+    ("Hygiène à domicile", [
+        "HOD", "Fréquence de brossage", "Moyens aux", "Fréquence Moyens Aux", "BdB", "Dentifrice",
+        "Type de poils", "Temps de brossage",
+    ]),
+    ("Examens", [
+        "CVE", "DCO", "EO", "IO", "Overbite", "Overjet", "Usures dentaires", "Classe d'angle", "Articulé Croisé",
+        "POST Options", "Autre POST Details", "RX", "Rétro-alvéolaire",
+    ]),
+    ("Parodonte et dépôts", ["DPSI", "Précisez les poches", "BF", "TR", "COL", "BOI", "BOP", "ED"]),
+    ("Quadrants", ["Q1", "Q2", "Q3", "Q4"]),
+    ("Diagnostic", ["DHD", "Justifier le diagnostique"]),
+    ("IHO", [
+        "IHO Technique de brossage", "IHO Conseillé de changé de méthode de brossage", "Bain de bouche",
+        "CHX - Combien de jours", "O2 - Combien de jours", "Autre bain de bouche", "Conseil de dentifrice",
+        "Produits d'hygiène", "Autre produits d'hygiène", "Espaces Interdentaires Maxillaire",
+        "Espaces Interdentaires Mandibulaire", "Moyens interdentaires",
+    ]),
+    ("ACJ et facturation", [
+        "ACJ", "Detartrage Options", "Surfaçage Options", "Autre Details", "PF dentiste", "Facturé",
+    ]),
+]
+CLES_RAPPORT = [cle for _, cles in SECTIONS for cle in cles]
+
+# Codes DPSI par sextant et grades des dépôts, du meilleur au moins bon
+DPSI_CODES = ["1", "2", "3-", "3+", "4"]
+DEPOT_OPTIONS = ["Inexistant", "+", "++", "+++", "++++"]
+DEPOTS = ["BF", "TR", "COL", "BOI", "BOP"]
+# Mesures numériques enregistrées à chaque visite pour le suivi dans le temps (voir mesures_visite)
+COLONNES_DPSI = ["sext1", "sext2", "sext3", "sext4", "sext5", "sext6"]
+COLONNES_DEPOTS = [depot.lower() for depot in DEPOTS]
+COLONNES_MESURES = COLONNES_DPSI + COLONNES_DEPOTS
+
+
+# Saisie d'une visite patient : un attribut par champ du formulaire, tous facultatifs.
+# Les noms sont ceux des variables du formulaire Streamlit, ce qui permet VisitePatient.from_mapping(globals()).
+@dataclass(slots=True)
+class VisitePatient:
+    # Informations Patient / Praticien
+    nom_prenom: str = ""
+    prochain_rdv: datetime | None = None
+    date_aujourdhui: date | None = None
+    num_patient: str = ""
+    date_naissance: date | None = None
+    hdd: time | None = None
+    praticien: str = ""
+
+    # Anamnèse
+    anm_type: str = ""
+    medicament: str = ""
+    pathologie: str = ""
+    allergies: str = ""
+    operations: str = ""
+    cigarette: str = ""
+    cigarette_details: str = ""
+    drogue: str = ""
+    drogue_details: str = ""
+    biphosphonate: str = ""
+    biphosphonate_details: str = ""
+    douleur: str = ""
+    pdp: str = ""
+    derniere_visite: str = ""
+    sexe: str = ""
+    enceinte: str = ""
+    contraception: str = ""
+    contraception_details: str = ""
+    activite: str = ""
+    rpp: str = ""
+    rpp_details: str = ""
+
+    # Habitudes Alimentaires
+    alim: str = ""
+    boissons: list = field(default_factory=list)
+    the_frequence: str = ""
+    cafe_frequence: str = ""
+    soda_frequence: str = ""
+    sucre: str = ""
+
+    # Hygiène à Domicile
+    hod: str = ""
+    frequence_brossage: str = ""
+    moyens_aux: list = field(default_factory=list)
+    frequence_moyens_aux: str = ""
+    bdb: str = ""
+    bdb_details: str = ""
+    dentifrice: str = ""
+    type_poils: str = ""
+    temps_brossage: str = ""
+
+    # Examens
+    cve: str = ""
+    dco: str = ""
+    dco_details: str = ""
+    eo: str = ""
+    eo_details: str = ""
+    io: str = ""
+    io_details: str = ""
+    overbite: str = ""
+    overbite_value: str = ""
+    overjet: str = ""
+    overjet_value: str = ""
+    classe_angle: str = ""
+    articule_croise: list = field(default_factory=list)
+    post_options: str | None = None
+    post_autre_details: str | None = None
+    usures_details: dict = field(default_factory=dict)
+    rx_choix: list = field(default_factory=list)
+    retro_autre: str = ""
+    sext1: str = ""
+    sext2: str = ""
+    sext3: str = ""
+    sext4: str = ""
+    sext5: str = ""
+    sext6: str = ""
+    precise_les_poches: str = ""
+    bf_data: list = field(default_factory=list)
+    bf_details: dict = field(default_factory=dict)
+    tr_data: list = field(default_factory=list)
+    tr_details: dict = field(default_factory=dict)
+    col_data: list = field(default_factory=list)
+    col_details: dict = field(default_factory=dict)
+    boi_data: list = field(default_factory=list)
+    boi_details: dict = field(default_factory=dict)
+    bop_data: list = field(default_factory=list)
+    bop_details: dict = field(default_factory=dict)
+    ed: str = ""
+    q1_details: dict = field(default_factory=dict)
+    q2_details: dict = field(default_factory=dict)
+    q3_details: dict = field(default_factory=dict)
+    q4_details: dict = field(default_factory=dict)
+    constats: object = None  # dents.Constats : registre plat des constats Q1–Q4
+    dhd: str | None = None
+    stade: str | None = None
+    grade: str | None = None
+    justifier_diagnostique: str | None = None
+    acj_choix: list = field(default_factory=list)
+    detartrage_choix: list = field(default_factory=list)
+    surfacage_choix: list = field(default_factory=list)
+    autre_details: str = ""
+    pf_dentiste: str = ""
+    facture: str = ""
+
+    # IHO
+    technique: str = ""
+    type_brosse: str = ""
+    bain_bouche: list = field(default_factory=list)
+    chx_days: str | None = None
+    o2_days: str | None = None
+    autre_text: str | None = None
+    conseil_dentifrice: str = ""
+    hygiene_products: list = field(default_factory=list)
+    other_hygiene_product: str | None = None
+    interdental_selection: dict = field(default_factory=dict)
+    all_interdental_data: dict = field(default_factory=dict)
+
+    # Construit une visite à partir d'un dictionnaire de variables ; les champs absents gardent leur défaut
+    @classmethod
+    def from_mapping(cls, mapping):
+        return cls(**{nom: mapping[nom] for nom in NOMS_CHAMPS if nom in mapping})
+
+
+NOMS_CHAMPS = tuple(f.name for f in fields(VisitePatient))
+
+
+# Fonction pour calculer l'âge (sans affichage)
+def calculer_age(born, today=None):
+    today = today or date.today()
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+# Fonction pour normaliser la sélection d'un espace interdentaire : détails retenus seulement pour les méthodes choisies
+def interdental_entry(methodes, marque=None, taille=None, taille_soft_pick=None):
+    methodes = [methode for methode in INTERDENTAL_METHODS if methode in (methodes or [])]
+    brossettes = "Brossettes interdentaires" in methodes
+    soft_pick = "Soft pick" in methodes
+    return {
+        "methodes": methodes,
+        "marque": (marque or BROSSETTES_MARQUES[0]) if brossettes else None,
+        "taille": (taille or BROSSETTES_TAILLES[0]) if brossettes else None,
+        "taille_soft_pick": (taille_soft_pick or SOFT_PICK_TAILLES[0]) if soft_pick else None,
+    }
+
+
+# Fonction pour formater un espace interdentaire comme dans les rapports ("Brossettes: TePe, 0.8mm, Fil dentaire")
+def format_interdental(entry):
+    method_details = []
+    if entry["marque"]:
+        method_details.append(f"Brossettes: {entry['marque']}, {entry['taille']}")
+    if entry["taille_soft_pick"]:
+        method_details.append(f"Soft pick: {entry['taille_soft_pick']}")
+    method_details.extend(m for m in entry["methodes"] if m not in ["Brossettes interdentaires", "Soft pick"])
+    return ", ".join(method_details) if method_details else "Aucun"
+
+
+# Moyens d'un espace interdentaire : (méthode, libellé avec marque et taille) ; "Aucun" n'en donne pas
+def _moyens_espace(entry):
+    for methode in entry.get("methodes", []):
+        if methode == "Brossettes interdentaires":
+            yield methode, f"{LIBELLES_MOYENS[methode]} {entry.get('marque')} {entry.get('taille')}"
+        elif methode == "Soft pick":
+            yield methode, f"{LIBELLES_MOYENS[methode]} {entry.get('taille_soft_pick')}"
+        elif methode in LIBELLES_MOYENS:
+            yield methode, LIBELLES_MOYENS[methode]
+
+
+# Fonction pour regrouper les espaces interdentaires (sélection structurée, voir interdental_entry) par moyen,
+# marque et taille : {"Brossettes TePe 0.8mm": "14-13, 13-12, 24-25", "Fil dentaire": "37-38"}.
+# Les groupes suivent l'ordre des méthodes, puis l'ordre de l'arcade.
+def grouper_interdentaires(selection):
+    groupes = {}
+    for space in MAXILLAIRE_SPACES + MANDIBULAIRE_SPACES:
+        entry = selection.get(space)
+        if entry:
+            for methode, libelle in _moyens_espace(entry):
+                groupes.setdefault((INTERDENTAL_METHODS.index(methode), libelle), []).append(space)
+    return {libelle: ", ".join(espaces) for (_, libelle), espaces in sorted(groupes.items(), key=lambda groupe: groupe[0][0])}
+
+
+# Fonction pour retrouver la méthode d'un libellé de grouper_interdentaires()
+def methode_interdentaire(libelle):
+    for methode, debut in LIBELLES_MOYENS.items():
+        if libelle == debut or libelle.startswith(f"{debut} "):
+            return methode
+    return None
+
+
+# Fonction pour formater les détails des dépôts dentaires
+def format_depot_details(depot_choix, depot_details):
+    if not depot_choix or "Inexistant" in depot_choix:
+        return "Inexistant"
+
+    details_string = ", ".join(depot_choix)  # Joindre tous les choix sélectionnés
+
+    if depot_details:
+        locations = []
+        if "Gen." in depot_details["locations"]:
+            locations.append("Gen.")
+        if "Collet" in depot_details["locations"]:
+            locations.append("Collet")
+        if "Préciser" in depot_details["locations"] and depot_details["Préciser"]:
+            locations.append(f"Préciser: {depot_details['Préciser']}")
+        if "Sext" in depot_details["locations"] and depot_details["Sext"]:
+            sext_values = ", ".join(depot_details['Sext'])
+            locations.append(f"Sext: {sext_values}")
+
+        if locations:
+            details_string += " (" + ", ".join(locations) + ")"
+
+    return details_string.strip()  # Supprime les espaces inutiles
+
+
+# Fonction pour extraire les mesures numériques d'un rapport (prepare_data ou rapport importé), dans l'ordre de COLONNES_MESURES :
+# rang DPSI par sextant (1 = "1" … 5 = "4") et grade des dépôts (0 = "Inexistant" … 4 = "++++"), None si non renseigné
+def mesures_visite(data):
+    dpsi = [None] * len(COLONNES_DPSI)
+    if data.get("DPSI"):
+        haut, _, bas = data["DPSI"].partition("|")
+        codes = [code.strip() for code in haut.split("/") + bas.split("/")]
+        # Le rapport suit l'ordre de la bouche : 1/2/3 | 6/5/4
+        for sextant, code in zip((0, 1, 2, 5, 4, 3), codes):
+            if code in DPSI_CODES:
+                dpsi[sextant] = DPSI_CODES.index(code) + 1
+    depots = []
+    for depot in DEPOTS:
+        choix = (data.get(depot) or "").split("(")[0].split(",")
+        grades = [DEPOT_OPTIONS.index(grade.strip()) for grade in choix if grade.strip() in DEPOT_OPTIONS]
+        depots.append(max(grades) if grades else None)
+    return dpsi + depots
+
+
+# Fonction pure pour construire le dictionnaire du rapport à partir d'une visite (utilisable sans Streamlit)
+def build_data(v):
+    interdental = v.all_interdental_data
+    data = {
+        "Nom et Prénom": v.nom_prenom if v.nom_prenom else None,
+        "Prochain Rendez-vous": v.prochain_rdv.strftime("%d.%m.%Y %H:%M") if v.prochain_rdv else None,
+        "Date d'aujourd'hui": v.date_aujourdhui.strftime("%d.%m.%Y") if v.date_aujourdhui else None,
+        "Numéro du Patient": v.num_patient if v.num_patient else None,
+        "Date de Naissance": v.date_naissance.strftime("%d.%m.%Y") if v.date_naissance else None,
+        "Âge": calculer_age(v.date_naissance) if v.date_naissance else None,
+        "Praticien": v.praticien if v.praticien else None,
+        "HDD": v.hdd.strftime('%H:%M') if v.hdd else None,
+        "RP-P": v.rpp_details if v.rpp == "Oui" and v.rpp_details else None,
+        "ANM": f"{v.anm_type}: {v.medicament} - {v.pathologie}" if v.anm_type and v.medicament and v.pathologie else None,
+        "Allergies": v.allergies if v.allergies else None,
+        "Opérations": v.operations if v.operations else None,
+        "Cigarette": v.cigarette_details if v.cigarette != "Non" and v.cigarette_details else v.cigarette if v.cigarette else None,
+        "Drogue": v.drogue_details if v.drogue != "Non" and v.drogue_details else v.drogue if v.drogue else None,
+        "Biphosphonate": v.biphosphonate_details if v.biphosphonate != "Non" and v.biphosphonate_details else v.biphosphonate if v.biphosphonate else None,
+        "Douleur quelconque": v.douleur if v.douleur else None,
+        "PDP": v.pdp if v.pdp else None,
+        "Dernière visite": v.derniere_visite if v.derniere_visite else None,
+        "Sexe": v.sexe if v.sexe else None,
+        "Enceinte": v.enceinte if v.sexe == "Femme" and v.enceinte else None,
+        "Contraception": v.contraception_details if v.sexe == "Femme" and v.contraception == "Oui" and v.contraception_details else None,
+        "Activité": v.activite if v.activite else None,
+        "ALIM": f"{v.alim} x/j" if v.alim else None,
+        "Boissons": ", ".join([f"{boisson} x/j" for boisson in v.boissons]) if v.boissons else None,
+        "Thé": f"{v.the_frequence} x/j" if "Thé" in v.boissons and v.the_frequence else None,
+        "Café": f"{v.cafe_frequence} x/j" if "Café" in v.boissons and v.cafe_frequence else None,
+        "Soda": f"{v.soda_frequence} x/j" if "Soda" in v.boissons and v.soda_frequence else None,
+        "Sucre": f"{v.sucre} x/j" if v.sucre else None,
+        "HOD": v.hod if v.hod else None,
+        "Fréquence de brossage": v.frequence_brossage if v.frequence_brossage else None,
+        "Moyens aux": ", ".join(v.moyens_aux) if v.moyens_aux else None,
+        "Fréquence Moyens Aux": v.frequence_moyens_aux if v.moyens_aux and v.frequence_moyens_aux else None,
+        "BdB": v.bdb_details if v.bdb == "Oui" and v.bdb_details else None,
+        "Dentifrice": v.dentifrice if v.dentifrice else None,
+        "Type de poils": v.type_poils if v.type_poils else None,
+        "Temps de brossage": v.temps_brossage if v.temps_brossage else None,
+        "CVE": v.cve if v.cve else None,
+        "DCO": v.dco_details if v.dco == "Suspicion" and v.dco_details else None,
+        "EO": v.eo_details if v.eo == "Suspicion" and v.eo_details else None,
+        "IO": v.io_details if v.io == "Suspicion" and v.io_details else None,
+        "Overbite": f"{v.overbite} - {v.overbite_value} mm" if v.overbite and v.overbite in ["Léger", "Moyen", "Important"] and v.overbite_value else None,
+        "Overjet": f"{v.overjet} - {v.overjet_value} mm" if v.overjet and v.overjet in ["Léger", "Moyen", "Important"] and v.overjet_value else None,
+        "Usures dentaires": v.usures_details if v.usures_details else None,
+        "Classe d'angle": v.classe_angle if v.classe_angle else None,
+        "Articulé Croisé": ", ".join(v.articule_croise) if v.articule_croise else None,
+        "POST Options": v.post_options if "POST" in v.articule_croise else None,
+        "Autre POST Details": v.post_autre_details if v.post_options == "Autre" else None,
+        "DPSI": f"{v.sext1}/{v.sext2}/{v.sext3} | {v.sext6}/{v.sext5}/{v.sext4}" if v.sext1 and v.sext2 and v.sext3 and v.sext4 and v.sext5 and v.sext6 else None,
+        "Précisez les poches": v.precise_les_poches if v.precise_les_poches else None,
+        "BF": format_depot_details(v.bf_data, v.bf_details),
+        "TR": format_depot_details(v.tr_data, v.tr_details),
+        "COL": format_depot_details(v.col_data, v.col_details),
+        "BOI": format_depot_details(v.boi_data, v.boi_details),
+        "BOP": format_depot_details(v.bop_data, v.bop_details),
+        "ED": v.ed if v.ed else None,
+        "Q1": v.q1_details if v.q1_details else None,
+        "Q2": v.q2_details if v.q2_details else None,
+        "Q3": v.q3_details if v.q3_details else None,
+        "Q4": v.q4_details if v.q4_details else None,
+        "RX": ", ".join(v.rx_choix) if v.rx_choix else None,
+        "Rétro-alvéolaire": v.retro_autre if "Rétro-alvéolaire" in v.rx_choix and v.retro_autre else None,
+        "DHD": f"{v.dhd} - Stade: {v.stade}, Grade: {v.grade}" if v.dhd == "Parodontite" and v.stade and v.grade else v.dhd,
+        "Justifier le diagnostique": v.justifier_diagnostique if v.justifier_diagnostique else None,
+        "IHO Technique de brossage": v.technique if v.technique else None,
+        "IHO Conseillé de changé de méthode de brossage": v.type_brosse if v.type_brosse else None,
+        "Bain de bouche": ", ".join(v.bain_bouche) if v.bain_bouche else None,
+        "CHX - Combien de jours": v.chx_days if "CHX" in v.bain_bouche and v.chx_days else None,
+        "O2 - Combien de jours": v.o2_days if "O2" in v.bain_bouche and v.o2_days else None,
+        "Autre bain de bouche": v.autre_text if "Autre" in v.bain_bouche and v.autre_text else None,
+        "Conseil de dentifrice": v.conseil_dentifrice if v.conseil_dentifrice else None,
+        "Produits d'hygiène": ", ".join(v.hygiene_products) if v.hygiene_products else None,
+        "Autre produits d'hygiène": v.other_hygiene_product if "Autre" in v.hygiene_products and v.other_hygiene_product else None,
+        "Espaces Interdentaires Maxillaire": "\n".join([f"{space}: {interdental[space]}" for space in MAXILLAIRE_SPACES if interdental.get(space)]),
+        "Espaces Interdentaires Mandibulaire": "\n".join([f"{space}: {interdental[space]}" for space in MANDIBULAIRE_SPACES if interdental.get(space)]),
+        "Moyens interdentaires": grouper_interdentaires(v.interdental_selection) or None,
+        "ACJ": ", ".join(v.acj_choix) if v.acj_choix else None,  # Include ACJ selections
+        "Detartrage Options": ", ".join(v.detartrage_choix) if v.detartrage_choix else None,  # Include Detartrage Options
+        "Surfaçage Options": ", ".join(v.surfacage_choix) if v.surfacage_choix else None,
+        "Autre Details": v.autre_details if "Autre" in v.acj_choix and v.autre_details else None,
+        "PF dentiste": v.pf_dentiste if v.pf_dentiste else None,
+        "Facturé": v.facture if v.facture else None,
+    }
+    # Supprimer les clés avec des valeurs None
+    return {cle: valeur for cle, valeur in data.items() if valeur is not None}